@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def pytest_configure(config):
+    # Тестовая база SQLite живёт в памяти, и поток пула мешал бы
+    # основному потоку писать в неё: миниатюры готовятся сразу.
+    # Пул проверяет ThumbnailWorkersTest.
+    settings.THUMBNAIL_WORKERS = 0
@@ -0,0 +1,65 @@
+"""Сериализация для JSON API без экземпляров моделей.
+
+Каждый ресурс описан словарём «поле ответа → путь ORM». Запрос берёт
+через .values() только выбранные в ?fields= поля (и ключ пагинации),
+а ответ собирается из этих словарей переименованием ключей.
+"""
+from django.core.files.storage import default_storage
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+# Поля, без которых не построить курсор следующей страницы.
+CURSOR_FIELDS = ('pub_date', 'id')
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+CONVERTERS = {'image': _image_url}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def parse_fields(value, available):
+    """Поля из параметра ?fields=; без него — все."""
+    if not value:
+        return list(available)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(available))
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def values(queryset, fields, available):
+    """values() с путями ORM выбранных полей и ключа пагинации."""
+    paths = {available[name] for name in fields}
+    paths.update(CURSOR_FIELDS)
+    return queryset.values(*paths)
+
+
+def serialize(row, fields, available):
+    result = {}
+    for name in fields:
+        value = row[available[name]]
+        converter = CONVERTERS.get(name)
+        result[name] = converter(value) if converter else value
+    return result
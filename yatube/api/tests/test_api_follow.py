@@ -0,0 +1,52 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class ApiFollowTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        for number in range(3):
+            User.objects.create_user(username=f'author{number}')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def post(self, data):
+        return self.client.post(reverse('api:follow_batch'),
+                                json.dumps(data),
+                                content_type='application/json')
+
+    def test_batch(self):
+        """Подписка и отписка на многих авторов одним запросом."""
+        data = self.post({'follow': ['author0', 'author1', 'author2']}).json()
+        self.assertEqual(data['followed'], ['author0', 'author1', 'author2'])
+        data = self.post({'unfollow': ['author1'], 'follow': []}).json()
+        self.assertEqual(data['unfollowed'], ['author1'])
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
+
+    def test_status(self):
+        """Статус подписки на список авторов одним запросом."""
+        self.post({'follow': ['author1']})
+        response = self.client.get(reverse('api:follow_status'),
+                                   {'authors': 'author0,author1,missing'})
+        self.assertEqual(response.json()['following'],
+                         {'author0': False, 'author1': True})
+
+    def test_errors(self):
+        """Неверные данные и аноним получают ошибку в JSON."""
+        self.assertEqual(self.post({'follow': 'author0'}).status_code, 400)
+        self.assertEqual(self.post({'follow': ['a'] * 101}).status_code, 400)
+        response = Client().get(reverse('api:follow_status'))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(reverse('api:follow_batch'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(POST_PER_PAGE + 3))
+        cls.post = Post.objects.latest('pk')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        """Ленты отдаются страницами с курсором на следующую."""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', kwargs={'slug': 'group'}),
+            reverse('api:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), POST_PER_PAGE)
+                self.assertEqual(data['results'][0]['author'], 'author')
+                self.assertEqual(data['results'][0]['group'], 'group')
+                self.assertIsNone(data['previous'])
+                rest = self.client.get(data['next']).json()['results']
+                self.assertEqual(len(rest), 3)
+
+    def test_fields(self):
+        """?fields= оставляет в ответе только выбранные поля."""
+        response = self.client.get(reverse('api:index'),
+                                   {'fields': 'id,text'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'text'})
+        response = self.client.get(reverse('api:index'),
+                                   {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_detail_and_comments(self):
+        """Пост и его комментарии."""
+        data = self.client.get(reverse(
+            'api:post_detail', kwargs={'post_id': self.post.pk})).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+        comments = self.client.get(reverse(
+            'api:comments', kwargs={'post_id': self.post.pk})).json()
+        self.assertEqual(comments['results'][0]['author'], 'reader')
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', response.json())
+
+    def test_etag_changes_with_comments(self):
+        """Новый комментарий меняет ETag лент: в них есть comments_count."""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_posts', kwargs={'slug': 'group'}),
+            reverse('api:profile', kwargs={'username': 'author'}),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(post=self.post, author=self.author, text='Да')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'], 2)
+
+    def test_follow_requires_login(self):
+        """Лента подписок доступна только вошедшему пользователю."""
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(len(client.get(url).json()['results']),
+                         POST_PER_PAGE)
+
+    def test_read_only(self):
+        """Изменять данные через API нельзя."""
+        response = self.client.post(reverse('api:index'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_single_query_per_page(self):
+        """Страница ленты — один запрос за данными."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:index'))
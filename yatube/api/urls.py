@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/posts/', views.index, name='index'),
+    path('v1/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('v1/posts/<int:post_id>/comments/', views.post_comments,
+         name='comments'),
+    path('v1/group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('v1/profile/<str:username>/', views.profile, name='profile'),
+    path('v1/follow/', views.follow_index, name='follow_index'),
+    path('v1/follow/status/', views.follow_status, name='follow_status'),
+    path('v1/follow/batch/', views.follow_batch, name='follow_batch'),
+]
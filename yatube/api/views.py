@@ -0,0 +1,154 @@
+import json
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from core.db_router import replica_view
+from posts.conditional import (conditional_page, group_state, index_state,
+                               post_state, profile_state)
+from posts.feed import follow_feed
+from posts.follows import (MAX_BATCH, follow_many, followed_author_ids,
+                           resolve_authors, unfollow_many)
+from posts.fragments import public_page
+from posts.models import Group, Post, User
+from posts.pagination import CursorPaginator
+from posts.utils import COMMENT_PER_PAGE, POST_PER_PAGE
+from .serializers import (COMMENT_FIELDS, POST_FIELDS, FieldsError,
+                          parse_fields, serialize, values)
+
+
+def _error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def api_view(methods=('GET', 'HEAD')):
+    """Ошибки отдаются в JSON, а не страницей; по умолчанию только
+    чтение."""
+    def decorator(view):
+        @require_http_methods(methods)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except FieldsError as exc:
+                return _error(400, str(exc))
+            except Http404:
+                return _error(404, 'Не найдено.')
+        return wrapper
+    return decorator
+
+
+def _page(request, queryset, available, per_page=POST_PER_PAGE):
+    fields = parse_fields(request.GET.get('fields'), available)
+    paginator = CursorPaginator(values(queryset, fields, available),
+                                per_page)
+    page = paginator.get_page(request.GET.get('cursor'), request.GET)
+    return JsonResponse({
+        'results': [serialize(row, fields, available) for row in page],
+        'next': page.next_url and request.path + page.next_url,
+        'previous': page.previous_url and request.path + page.previous_url,
+    })
+
+
+@replica_view
+@api_view()
+@public_page
+@conditional_page(index_state)
+def index(request):
+    return _page(request, Post.objects.for_feed(), POST_FIELDS)
+
+
+@replica_view
+@api_view()
+@public_page
+@conditional_page(group_state)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _page(request, group.posts.for_feed(), POST_FIELDS)
+
+
+@replica_view
+@api_view()
+@public_page
+@conditional_page(profile_state)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return _page(request, author.posts.for_feed(), POST_FIELDS)
+
+
+@replica_view
+@api_view()
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужно войти.')
+    return _page(request, follow_feed(request.user).for_feed(),
+                 POST_FIELDS)
+
+
+@replica_view
+@api_view()
+@public_page
+@conditional_page(post_state)
+def post_detail(request, post_id):
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    row = values(Post.objects.filter(pk=post_id), fields,
+                 POST_FIELDS).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(serialize(row, fields, POST_FIELDS))
+
+
+@replica_view
+@api_view()
+@public_page
+@conditional_page(post_state)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    return _page(request, post.comments.all(), COMMENT_FIELDS,
+                 COMMENT_PER_PAGE)
+
+
+def _usernames(value):
+    if not isinstance(value, list) or not all(
+            isinstance(name, str) for name in value):
+        raise ValueError('Ожидается список имён пользователей.')
+    if len(value) > MAX_BATCH:
+        raise ValueError(f'Не больше {MAX_BATCH} имён за раз.')
+    return value
+
+
+@api_view()
+def follow_status(request):
+    """{имя: подписан ли текущий пользователь} для ?authors=a,b,c."""
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужно войти.')
+    try:
+        usernames = _usernames([name for name in request.GET.get(
+            'authors', '').split(',') if name])
+    except ValueError as exc:
+        return _error(400, str(exc))
+    authors = resolve_authors(usernames)
+    followed = followed_author_ids(request.user, list(authors.values()))
+    return JsonResponse({'following': {
+        name: pk in followed for name, pk in authors.items()}})
+
+
+@api_view(['POST'])
+def follow_batch(request):
+    """Подписки и отписки пачкой: {"follow": [...], "unfollow": [...]}."""
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужно войти.')
+    try:
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Ожидается объект JSON.')
+        follow = _usernames(data.get('follow', []))
+        unfollow = _usernames(data.get('unfollow', []))
+    except ValueError as exc:
+        return _error(400, str(exc))
+    return JsonResponse({
+        'followed': follow_many(request.user, follow),
+        'unfollowed': unfollow_many(request.user, unfollow),
+    })
@@ -0,0 +1,132 @@
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_cache_key, patch_response_headers
+from django.views.decorators.cache import cache_page
+
+# Сколько живёт блокировка перестроения, если процесс-лидер упал.
+LOCK_TIMEOUT: int = 30
+# Сколько остальные процессы ждут результат лидера, прежде чем
+# посчитать его самостоятельно.
+WAIT_TIMEOUT: float = 5.0
+POLL_INTERVAL: float = 0.05
+
+
+def _version_key(namespace):
+    return f'cache_version:{namespace}'
+
+
+def get_cache_version(namespace):
+    """Текущая версия ключей пространства имён в кеше."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Начинаем с метки времени, чтобы после вытеснения счётчика
+        # из кеша не воскресить старые записи.
+        version = int(time.time() * 1000)
+        cache.add(_version_key(namespace), version, None)
+        version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def bump_cache_version(namespace):
+    """Делает все ключи пространства имён устаревшими."""
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        return get_cache_version(namespace)
+
+
+@contextmanager
+def rebuild_lock(key, timeout=LOCK_TIMEOUT):
+    """Блокировка в общем кеше: True получает только один процесс."""
+    lock_key = f'lock:{key}'
+    token = uuid.uuid4().hex
+    acquired = cache.add(lock_key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def wait_for(fetch, wait=WAIT_TIMEOUT, poll=POLL_INTERVAL):
+    """Опрашивает fetch, пока он не вернёт значение или не выйдет время."""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        value = fetch()
+        if value is not None:
+            return value
+    return None
+
+
+def single_flight(key, compute, timeout, stale=None, wait=WAIT_TIMEOUT):
+    """Значение из кеша; при промахе его вычисляет только один процесс.
+
+    Остальные отдают stale, если он передан, или ждут результат
+    лидера не дольше wait секунд.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with rebuild_lock(key) as leader:
+        if not leader:
+            if stale is not None:
+                return stale
+            value = wait_for(lambda: cache.get(key), wait)
+            if value is not None:
+                return value
+        value = compute()
+        cache.set(key, value, timeout)
+        return value
+
+
+def _cached_response(request, key_prefix):
+    cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+    return cache.get(cache_key) if cache_key else None
+
+
+def versioned_cache_page(timeout, namespace, browser_timeout=0):
+    """cache_page, чьи записи устаревают при bump_cache_version(namespace).
+
+    Версия входит в префикс ключа, поэтому после изменения данных
+    страница собирается заново, не дожидаясь истечения timeout.
+    Перестраивает страницу один процесс, остальные тем временем отдают
+    предыдущую версию или ждут его результат.
+    Браузерам отдаётся browser_timeout, а не timeout: иначе они
+    не увидели бы новую версию страницы до истечения срока.
+    """
+    rendered_key = f'cache_rendered:{namespace}'
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            version = get_cache_version(namespace)
+            key_prefix = f'{namespace}.{version}'
+            cached_view = cache_page(timeout, key_prefix=key_prefix)(view)
+            response = None
+            if request.method in ('GET', 'HEAD') and (
+                    _cached_response(request, key_prefix) is None):
+                lock_key = (get_cache_key(request, key_prefix, 'GET',
+                                          cache=cache)
+                            or f'{key_prefix}:{request.get_full_path()}')
+                with rebuild_lock(lock_key) as leader:
+                    if leader:
+                        response = cached_view(request, *args, **kwargs)
+                        cache.set(rendered_key, version, None)
+                    else:
+                        response = _cached_response(
+                            request,
+                            f'{namespace}.{cache.get(rendered_key)}',
+                        ) or wait_for(
+                            lambda: _cached_response(request, key_prefix))
+            if response is None:
+                response = cached_view(request, *args, **kwargs)
+            del response['Expires']
+            patch_response_headers(response, browser_timeout)
+            return response
+        return wrapper
+    return decorator
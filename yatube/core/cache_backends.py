@@ -0,0 +1,37 @@
+"""Бэкенды кеша Django, которые считают попадания и промахи
+для core.metrics."""
+from django.core.cache.backends import filebased, locmem, memcached
+
+from . import metrics
+
+_MISSING = object()
+
+
+class CountingMixin:
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            metrics.incr('cache_misses')
+            return default
+        metrics.incr('cache_hits')
+        return value
+
+
+class LocMemCache(CountingMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CountingMixin, filebased.FileBasedCache):
+    pass
+
+
+class MemcachedCache(CountingMixin, memcached.MemcachedCache):
+
+    def get_many(self, keys, version=None):
+        # В отличие от остальных бэкендов, memcached читает ключи
+        # одним запросом, а не через get().
+        found = super().get_many(keys, version)
+        metrics.incr('cache_hits', len(found))
+        metrics.incr('cache_misses', len(keys) - len(found))
+        return found
@@ -0,0 +1,33 @@
+import importlib.util
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .template_backends import warm_templates
+
+
+@register(Tags.templates, deploy=True)
+def check_templates(app_configs, **kwargs):
+    """Все шаблоны компилируются; заодно прогревает кеш загрузчика.
+
+    Компилирует каждый шаблон, поэтому запускается только с --deploy,
+    а не перед каждой командой.
+    """
+    return [
+        Error(f'Шаблон {name} не компилируется: {error}', id='core.E001')
+        for name, _, error in warm_templates() if error
+    ]
+
+
+@register(Tags.caches)
+def check_cache_backend(app_configs, **kwargs):
+    """Для memcached установлен python-memcached."""
+    backend = settings.CACHES['default']['BACKEND']
+    if (backend.endswith('MemcachedCache')
+            and importlib.util.find_spec('memcache') is None):
+        return [Error(
+            'Для YATUBE_CACHE=memcached нужен пакет python-memcached.',
+            hint='pip install -r requirements.txt',
+            id='core.E002',
+        )]
+    return []
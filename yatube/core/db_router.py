@@ -0,0 +1,65 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики (settings.DATABASE_REPLICAS) читают только view, отмеченные
+@replica_view, и только на GET и HEAD: ReplicaReadsMiddleware
+включает для них replica_reads(), если клиент недавно ничего не
+менял. Остальные страницы (админка, вход, персональные фрагменты),
+запросы на изменение, чтение внутри транзакции, команды и фоновые
+потоки идут в основную базу. View, которые меняют данные на GET,
+отмечаются @write_view.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_local = threading.local()
+
+
+def replica_view(view):
+    """Разрешает view читать с реплик."""
+    view.replica_reads = True
+    return view
+
+
+def write_view(view):
+    """Отмечает view, который меняет данные даже на GET."""
+    view.writes_data = True
+    return view
+
+
+def set_replica_reads(enabled):
+    _local.enabled = enabled
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Разрешает или запрещает чтение с реплик внутри блока."""
+    previous = getattr(_local, 'enabled', False)
+    set_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        set_replica_reads(previous)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not getattr(_local, 'enabled', False)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
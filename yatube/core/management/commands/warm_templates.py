@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_backends import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны и показывает самые медленные '
+            'по времени компиляции.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slowest', type=int, default=10,
+                            help='Сколько шаблонов показать.')
+
+    def handle(self, *args, **options):
+        result = warm_templates()
+        errors = [(name, error) for name, _, error in result if error]
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        slowest = sorted(result, key=lambda item: item[1], reverse=True)
+        for name, seconds, _ in slowest[:options['slowest']]:
+            self.stdout.write(f'{seconds * 1000:8.2f} мс  {name}')
+        total = sum(seconds for _, seconds, _ in result)
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {len(result)} '
+            f'за {total * 1000:.1f} мс.'))
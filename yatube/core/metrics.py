@@ -0,0 +1,107 @@
+"""Замеры отдельных запросов и сводка по страницам.
+
+RequestMetricsMiddleware заводит для запроса объект RequestMetrics,
+а SQL-обёртка, шаблонный бэкенд, кеш и подготовка миниатюр пишут
+в него через incr() и timed(). Вне запроса (в командах, в фоновых
+потоках) замеры никуда не пишутся и почти ничего не стоят.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = defaultdict(Counter)
+
+
+class RequestMetrics:
+    """Счётчики и время (в секундах) одного запроса."""
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = Counter()
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing."""
+        counters, timings = self.counters, self.timings
+        parts = [
+            f'db;dur={timings["db"] * 1000:.1f};'
+            f'desc="{counters["db"]} queries"',
+            f'tpl;dur={timings["template"] * 1000:.1f}',
+            f'tpl-compile;dur={timings["template_compile"] * 1000:.1f};'
+            f'desc="{counters["template_compile"]} templates"',
+            f'cache;desc="{counters["cache_hits"]} hits, '
+            f'{counters["cache_misses"]} misses"',
+            f'thumb;desc="{counters["thumbnails"]} generated"',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ', '.join(parts)
+
+
+def current():
+    """Замеры текущего запроса или None."""
+    return getattr(_local, 'metrics', None)
+
+
+def start():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def stop():
+    _local.metrics = None
+
+
+def incr(name, value=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.counters[name] += value
+
+
+@contextmanager
+def timed(name):
+    """Прибавляет время блока к замеру name и считает вызовы."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+        metrics.counters[name] += 1
+
+
+def record(view_name, metrics, total):
+    """Добавляет запрос в сводку по странице view_name."""
+    with _lock:
+        totals = _totals[view_name]
+        totals['requests'] += 1
+        totals['total'] += total
+        totals.update({f'{name}_time': value
+                       for name, value in metrics.timings.items()})
+        totals.update(metrics.counters)
+
+
+def summary():
+    """Средние значения на запрос по каждой странице."""
+    with _lock:
+        snapshot = {view: dict(totals) for view, totals in _totals.items()}
+    result = {}
+    for view, totals in sorted(snapshot.items()):
+        requests = totals.pop('requests')
+        result[view] = {'requests': requests}
+        for name, value in sorted(totals.items()):
+            if name == 'total' or name.endswith('_time'):
+                result[view][f'{name}_ms'] = round(
+                    value / requests * 1000, 2)
+            else:
+                result[view][name] = round(value / requests, 2)
+    return result
+
+
+def reset():
+    with _lock:
+        _totals.clear()
@@ -0,0 +1,99 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import db_router, metrics
+from .template_backends import instrument
+
+logger = logging.getLogger('core.metrics')
+
+# Cookie, с которым клиент читает из основной базы после изменений.
+PRIMARY_COOKIE = 'read_primary'
+
+
+def _timed_query(execute, sql, params, many, context):
+    with metrics.timed('db'):
+        return execute(sql, params, many, context)
+
+
+class RequestMetricsMiddleware:
+    """SQL, шаблоны, кеш и миниатюры каждого запроса.
+
+    Включается настройкой REQUEST_METRICS. Итоги отдаются в заголовке
+    Server-Timing, пишутся строкой в лог core.metrics и копятся
+    по имени страницы для core.views.request_metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        instrument()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_query))
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        total = time.perf_counter() - started
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        metrics.record(view_name, request_metrics, total)
+        counters, timings = request_metrics.counters, request_metrics.timings
+        logger.info(
+            'view=%s status=%s total_ms=%.1f db=%d db_ms=%.1f '
+            'template_ms=%.1f compile_ms=%.1f cache_hits=%d '
+            'cache_misses=%d thumbnails=%d',
+            view_name, response.status_code, total * 1000,
+            counters['db'], timings['db'] * 1000,
+            timings['template'] * 1000, timings['template_compile'] * 1000,
+            counters['cache_hits'],
+            counters['cache_misses'], counters['thumbnails'])
+        return response
+
+
+class ReplicaReadsMiddleware:
+    """GET и HEAD view с @replica_view читают с реплик, если они есть.
+
+    После запроса на изменение (не GET и не HEAD или view
+    с @write_view) клиент получает cookie PRIMARY_COOKIE на
+    REPLICA_STICKY_SECONDS секунд и всё это время читает из основной
+    базы, чтобы увидеть свои изменения, пока реплики их догоняют.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.set_replica_reads(False)
+        if (request.method not in ('GET', 'HEAD')
+                or getattr(request, 'writes_data', False)):
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.writes_data = getattr(view_func, 'writes_data', False)
+        db_router.set_replica_reads(
+            request.method in ('GET', 'HEAD')
+            and getattr(view_func, 'replica_reads', False)
+            and not request.writes_data
+            and PRIMARY_COOKIE not in request.COOKIES)
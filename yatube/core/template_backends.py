@@ -0,0 +1,122 @@
+"""Шаблонный бэкенд Django с замерами и прогрев шаблонов.
+
+С TEMPLATE_CACHE (по умолчанию — без DEBUG) шаблоны компилируются один
+раз и живут в кеше загрузчика (cached.Loader); warm_templates()
+компилирует их все заранее при старте процесса, в проверке core.E001
+(``manage.py check --deploy``) и командой ``manage.py warm_templates``.
+С REQUEST_METRICS instrument() добавляет в замеры запроса время
+компиляции и отрисовки каждого шаблона, включая подключённые через
+include и extends.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, base, engines
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        with metrics.timed('template'):
+            return super().render(context, request)
+
+
+def cache_enabled(options=None):
+    if settings.TEMPLATE_CACHE is not None:
+        return settings.TEMPLATE_CACHE
+    return not (options or {}).get('debug', settings.DEBUG)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Бэкенд Django с замерами отрисовки.
+
+    Загрузчики по умолчанию те же, что собирает Django: filesystem,
+    app_directories при APP_DIRS и cached.Loader поверх них без debug.
+    Новое только одно: заданный TEMPLATE_CACHE включает или выключает
+    cached.Loader независимо от debug. Явные OPTIONS['loaders']
+    не меняются.
+    """
+
+    def __init__(self, params):
+        options = params.get('OPTIONS', {})
+        if 'loaders' not in options and settings.TEMPLATE_CACHE is not None:
+            loaders = ['django.template.loaders.filesystem.Loader']
+            if params.get('APP_DIRS'):
+                loaders.append(
+                    'django.template.loaders.app_directories.Loader')
+            if cache_enabled(options):
+                loaders = [('django.template.loaders.cached.Loader',
+                            loaders)]
+            params = {**params, 'APP_DIRS': False,
+                      'OPTIONS': {**options, 'loaders': loaders}}
+        super().__init__(params)
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except django_backend.TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+def instrument():
+    """Подключает замеры к каждому шаблону; повторный вызов ничего
+    не меняет."""
+    if getattr(base.Template._render, 'instrumented', False):
+        return
+    render = base.Template._render
+    compile_nodelist = base.Template.compile_nodelist
+
+    def timed_render(self, context):
+        with metrics.timed(f'render:{self.name}'):
+            return render(self, context)
+
+    def timed_compile(self):
+        with metrics.timed('template_compile'), \
+                metrics.timed(f'compile:{self.name}'):
+            return compile_nodelist(self)
+
+    timed_render.instrumented = True
+    base.Template._render = timed_render
+    base.Template.compile_nodelist = timed_compile
+
+
+def _loader_dirs(loader):
+    for child in getattr(loader, 'loaders', [loader]):
+        yield from child.get_dirs()
+
+
+def template_names(engine):
+    """Имена всех шаблонов, которые видят загрузчики движка."""
+    names = {}
+    for loader in engine.template_loaders:
+        for directory in _loader_dirs(loader):
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    name = os.path.relpath(
+                        os.path.join(root, filename), directory)
+                    names.setdefault(name.replace(os.sep, '/'), None)
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны; возвращает [(имя, секунды, ошибка)]."""
+    result = []
+    for backend in engines.all():
+        if not isinstance(backend, django_backend.DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            started = time.perf_counter()
+            try:
+                backend.engine.get_template(name)
+                error = None
+            except (TemplateSyntaxError, UnicodeDecodeError) as exc:
+                error = exc
+            result.append((name, time.perf_counter() - started, error))
+    return result
@@ -0,0 +1,29 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page, on_each_side=2):
+    """Номера страниц вокруг текущей, пропуски обозначены None."""
+    num_pages = page.paginator.num_pages
+    start = max(page.number - int(on_each_side), 1)
+    end = min(page.number + int(on_each_side), num_pages)
+    window = list(range(start, end + 1))
+    if start > 1:
+        window[:0] = [1] if start == 2 else [1, None]
+    if end < num_pages:
+        window += [num_pages] if end == num_pages - 1 else [None, num_pages]
+    return window
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """Ссылка на страницу с сохранением остальных GET-параметров."""
+    request = context.get('request')
+    params = request.GET.copy() if request is not None else {}
+    params['page'] = number
+    params.pop('cursor', None)
+    if hasattr(params, 'urlencode'):
+        return f'?{params.urlencode()}'
+    return f'?page={number}'
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import bump_cache_version, single_flight
+from core.checks import check_cache_backend
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SingleFlightTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_value_is_computed_once(self):
+        """Значение вычисляется при промахе и дальше берётся из кеша."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 42
+
+        self.assertEqual(single_flight('answer', compute, 60), 42)
+        self.assertEqual(single_flight('answer', compute, 60), 42)
+        self.assertEqual(len(calls), 1)
+
+    def test_follower_gets_stale_value(self):
+        """Пока другой процесс перестраивает значение, отдаётся старое."""
+        cache.add('lock:answer', 'leader', 60)
+        value = single_flight('answer', lambda: 42, 60, stale=41)
+        self.assertEqual(value, 41)
+        self.assertIsNone(cache.get('answer'))
+
+    def test_follower_computes_after_wait(self):
+        """Если лидер не успел, значение считается самостоятельно."""
+        cache.add('lock:answer', 'leader', 60)
+        value = single_flight('answer', lambda: 42, 60, wait=0.1)
+        self.assertEqual(value, 42)
+
+
+class VersionedCachePageTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Старый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stale_page_while_rebuilding(self):
+        """Пока страница перестраивается, остальные получают прежнюю."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.bulk_create([Post(author=self.user, text='Новый пост')])
+        version = bump_cache_version('index_page')
+        cache.add(f'lock:index_page.{version}:{url}', 'leader', 60)
+        response = self.client.get(url)
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Новый пост')
+        cache.delete(f'lock:index_page.{version}:{url}')
+        response = self.client.get(url)
+        self.assertContains(response, 'Новый пост')
+
+
+class CacheBackendCheckTest(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'core.cache_backends.MemcachedCache'}})
+    def test_memcached_without_client(self):
+        """Без python-memcached проверка сообщает, что его не хватает."""
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            errors = check_cache_backend(None)
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+
+    def test_default_backend(self):
+        self.assertEqual(check_cache_backend(None), [])
@@ -0,0 +1,92 @@
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from core.db_router import replica_reads, replica_view, write_view
+from core.middleware import PRIMARY_COOKIE, ReplicaReadsMiddleware
+from posts.models import Post
+
+
+def read_alias(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@replica_view
+def feed(request):
+    return read_alias(request)
+
+
+@write_view
+def follow(request):
+    return read_alias(request)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRouterTest(SimpleTestCase):
+    # Не TestCase: он держит каждый тест в транзакции, а в ней
+    # роутер всегда выбирает основную базу.
+    databases = {'default'}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_view(self, request, view):
+        """Запрос через middleware; view отвечает, куда пошло бы чтение."""
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaReadsMiddleware(get_response)
+        return middleware(request)
+
+    def test_router(self):
+        """Реплики только внутри replica_reads и вне транзакций."""
+        self.assertEqual(router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+            with replica_reads(False):
+                self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    def test_transaction_reads_primary(self):
+        """В транзакции чтение идёт туда же, куда запись."""
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_only_marked_views_read_replicas(self):
+        """С реплик читают только GET отмеченных view."""
+        self.assertEqual(self.run_view(
+            self.factory.get('/'), read_alias).content, b'default')
+        response = self.run_view(self.factory.get('/'), feed)
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_sticky_after_write(self):
+        """После изменения клиент читает из основной базы."""
+        for request, view in ((self.factory.post('/'), feed),
+                              (self.factory.get('/'), follow)):
+            with self.subTest(method=request.method):
+                response = self.run_view(request, view)
+                self.assertEqual(response.content, b'default')
+                cookie = response.cookies[PRIMARY_COOKIE]
+                self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_COOKIE] = cookie.value
+        self.assertEqual(self.run_view(request, feed).content, b'default')
+
+    def test_views_marked(self):
+        """Ленты читают с реплик, подписка на GET считается записью."""
+        for name, kwargs in (('posts:index', {}),
+                             ('posts:follow_index', {}),
+                             ('api:index', {})):
+            with self.subTest(name=name):
+                self.assertTrue(
+                    resolve(reverse(name, kwargs=kwargs)).func.replica_reads)
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                func = resolve(reverse(
+                    name, kwargs={'username': 'author'})).func
+                self.assertTrue(func.writes_data)
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_METRICS=True)
+class RequestMetricsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        # Middleware подключается при первом запросе клиента,
+        # поэтому клиент создаётся уже с включённой настройкой.
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит замеры SQL, шаблонов, кеша и общего времени."""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'thumb;desc=',
+                     'total;dur='):
+            self.assertIn(name, timing)
+        self.assertNotIn('db;dur=0.0;desc="0 queries"', timing)
+
+    def test_summary_by_view_name(self):
+        """Запросы копятся в сводке по имени страницы."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        summary = metrics.summary()['posts:index']
+        self.assertEqual(summary['requests'], 2)
+        self.assertGreater(summary['db'], 0)
+        self.assertGreater(summary['template'], 0)
+        self.assertGreater(summary['cache_misses'], 0)
+        self.assertIn('total_ms', summary)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """Сводка по адресу /metrics/ доступна только персоналу."""
+        self.client.get(reverse('posts:index'))
+        url = reverse('request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        views = self.client.get(url).json()['views']
+        self.assertEqual(views['posts:index']['requests'], 1)
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_disabled_by_default(self):
+        """Без настройки заголовок не добавляется."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(metrics.summary(), {})
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks.registry import registry
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.checks import check_templates
+from core.template_backends import warm_templates
+
+
+class TemplateCacheTest(TestCase):
+
+    @override_settings(TEMPLATE_CACHE=True)
+    def test_cached_loader(self):
+        """В боевом режиме шаблоны берутся из кеша загрузчика."""
+        with override_settings(TEMPLATES=settings.TEMPLATES):
+            engine = engines.all()[0].engine
+            self.assertEqual(engine.loaders[0][0],
+                             'django.template.loaders.cached.Loader')
+            first = engine.get_template('includes/post.html')
+            self.assertIs(engine.get_template('includes/post.html'), first)
+
+    def test_warm_templates(self):
+        """Прогрев компилирует все шаблоны проекта без ошибок."""
+        result = {name: error for name, _, error in warm_templates()}
+        self.assertIn('posts/index.html', result)
+        self.assertIn('includes/paginator.html', result)
+        self.assertFalse([name for name, error in result.items() if error])
+
+    def test_check_reports_broken_template(self):
+        """Проверка core.E001 находит шаблон, который не компилируется."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(f'{directory}/broken.html', 'w') as broken:
+            broken.write('{% if %}')
+        templates = [{**settings.TEMPLATES[0], 'DIRS': [directory]}]
+        with override_settings(TEMPLATES=templates):
+            errors = check_templates(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        self.assertIn('broken.html', errors[0].msg)
+
+    def test_check_only_on_deploy(self):
+        """Проверка шаблонов идёт только с check --deploy."""
+        self.assertNotIn(check_templates, registry.get_checks())
+        self.assertIn(check_templates, registry.get_checks(
+            include_deployment_checks=True))
+
+
+@override_settings(REQUEST_METRICS=True)
+class TemplateMetricsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_render_time_per_template(self):
+        """Замеры запроса разбиты по шаблонам, включая include."""
+        Client().get(reverse('posts:index'))
+        summary = metrics.summary()['posts:index']
+        self.assertIn('render:posts/index.html_time_ms', summary)
+        self.assertIn('render:includes/paginator.html_time_ms', summary)
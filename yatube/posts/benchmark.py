@@ -0,0 +1,195 @@
+"""Нагрузочный прогон публичных страниц.
+
+generate() заполняет базу воспроизводимым набором пользователей,
+групп, постов, комментариев и подписок через posts.bulk_import.
+Driver.run() гоняет запросы к страницам через WSGI-приложение в том
+же процессе, а report() сводит задержки p50/p95/p99, число
+SQL-запросов и пик выделенной памяти по каждой странице.
+Запуск: ``manage.py benchmark``.
+"""
+import math
+import random
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import timedelta
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from django.utils import timezone
+
+from .bulk_import import Importer
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+WORDS = ('пост', 'лента', 'группа', 'автор', 'подписка', 'картинка',
+         'комментарий', 'новость', 'заметка', 'день', 'город', 'книга',
+         'музыка', 'путешествие', 'работа', 'кино', 'погода', 'кофе')
+
+
+def _text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(users=50, groups=5, posts=1000, comments=2000, follows=200,
+             seed=0):
+    """Заполняет базу данными; один и тот же seed даёт те же данные."""
+    rnd = random.Random(seed)
+    usernames = [f'user{number}' for number in range(users)]
+    slugs = [f'group-{number}' for number in range(groups)]
+    now = timezone.now()
+    importer = Importer(create_users=True)
+    importer.run('groups', (
+        {'title': f'Группа {number}', 'slug': slug,
+         'description': _text(rnd, 10)}
+        for number, slug in enumerate(slugs)))
+    first_post = (Post.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0) + 1
+    post_ids = range(first_post, first_post + posts)
+    importer.run('posts', (
+        {'id': post_id, 'author__username': rnd.choice(usernames),
+         'group__slug': rnd.choice(slugs) if rnd.random() < 0.7 else '',
+         'text': _text(rnd, rnd.randint(5, 60)),
+         'pub_date': now - timedelta(minutes=number)}
+        for number, post_id in enumerate(post_ids)))
+    importer.run('comments', (
+        {'post_id': rnd.choice(post_ids),
+         'author__username': rnd.choice(usernames),
+         'text': _text(rnd, rnd.randint(3, 20)),
+         'pub_date': now - timedelta(seconds=number)}
+        for number in range(comments)))
+    importer.run('follows', (
+        dict(zip(('user__username', 'author__username'),
+                 rnd.sample(usernames, 2)))
+        for _ in range(follows)))
+    importer.finish()
+
+
+class Driver:
+    """Запросы к страницам через WSGI-приложение в этом же процессе."""
+
+    def __init__(self, seed=0):
+        self.app = get_wsgi_application()
+        self.rnd = random.Random(seed)
+        self.usernames = list(User.objects.filter(
+            posts__isnull=False).distinct().values_list(
+            'username', flat=True))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        reader = (Follow.objects.values_list('user', flat=True).first()
+                  or User.objects.values_list('pk', flat=True).first())
+        client = Client()
+        client.force_login(User.objects.get(pk=reader))
+        self.cookies = '; '.join(
+            f'{name}={morsel.value}'
+            for name, morsel in client.cookies.items())
+
+    def path(self, view):
+        """Адрес случайной страницы view; иногда не первой."""
+        page = self.rnd.choice(('', '', '', '?page=2', '?page=3'))
+        if view == 'index':
+            return '/' + page
+        if view == 'group_posts':
+            return f'/group/{self.rnd.choice(self.slugs)}/' + page
+        if view == 'profile':
+            return f'/profile/{self.rnd.choice(self.usernames)}/' + page
+        if view == 'post_detail':
+            return f'/posts/{self.rnd.choice(self.post_ids)}/'
+        return '/follow/' + page
+
+    def request(self, path):
+        """Выполняет GET и возвращает (статус, секунды, число запросов)."""
+        environ = {}
+        setup_testing_defaults(environ)
+        path, _, query = path.partition('?')
+        environ.update(PATH_INFO=path, QUERY_STRING=query,
+                       HTTP_COOKIE=self.cookies)
+        statuses = []
+        queries = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            # Запросы к репликам тоже считаются.
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            started = time.perf_counter()
+            response = self.app(environ, start_response)
+            try:
+                for _ in response:
+                    pass
+            finally:
+                response.close()
+            elapsed = time.perf_counter() - started
+        return int(statuses[0].split()[0]), elapsed, len(queries)
+
+    def run(self, view, requests=100, warmup=5, memory_samples=5):
+        """Замеры одной страницы; прогрев в статистику не входит."""
+        for _ in range(warmup):
+            self.request(self.path(view))
+        result = {'view': view, 'latencies': [], 'queries': [],
+                  'errors': 0, 'peak_memory': 0}
+        for _ in range(requests):
+            status, elapsed, queries = self.request(self.path(view))
+            result['latencies'].append(elapsed)
+            result['queries'].append(queries)
+            result['errors'] += status >= 400
+        # Память меряется отдельно: tracemalloc сильно замедляет запросы.
+        # Трассировка запускается заново на каждый запрос, и её пик —
+        # пик самого запроса (reset_peak() есть только с Python 3.9).
+        for _ in range(memory_samples):
+            tracemalloc.start()
+            try:
+                self.request(self.path(view))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            result['peak_memory'] = max(result['peak_memory'], peak)
+        return result
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(result):
+    latencies = result['latencies']
+    queries = result['queries']
+    return {
+        'view': result['view'],
+        'requests': len(latencies),
+        'errors': result['errors'],
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_avg': round(sum(queries) / len(queries), 1),
+        'queries_max': max(queries),
+        'peak_memory_kb': round(result['peak_memory'] / 1024, 1),
+    }
+
+
+def report(summaries):
+    """Таблица итогов для вывода в консоль."""
+    columns = ('view', 'requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms',
+               'queries_avg', 'queries_max', 'peak_memory_kb')
+    rows = [columns] + [tuple(str(summary[column]) for column in columns)
+                        for summary in summaries]
+    widths = [max(len(row[index]) for row in rows)
+              for index in range(len(columns))]
+    return '\n'.join(
+        '  '.join(value.ljust(width)
+                  for value, width in zip(row, widths)).rstrip()
+        for row in rows)
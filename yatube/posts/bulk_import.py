@@ -0,0 +1,216 @@
+"""Массовая загрузка групп, постов, комментариев и подписок.
+
+Читает NDJSON или CSV в формате posts.export и пишет строки пачками
+через bulk_create, каждую пачку в своей транзакции. Сигналы при этом
+не срабатывают, поэтому их работа делается один раз в конце:
+пересчёт счётчиков, сброс кешей, поисковый индекс, ленты подписок
+и миниатюры картинок.
+Авторы ищутся по username через словарь в памяти.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import bump_cache_version
+from . import counters, feed, search, thumbnails
+from .counts import COUNT_NAMESPACE
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE: int = 1000
+FORMATS = ('ndjson', 'csv')
+MODELS = {
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+
+
+def read_rows(stream, import_format):
+    """Словари строк из файла NDJSON или CSV."""
+    if import_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def keep_dates(model):
+    """Не даёт auto_now и auto_now_add затереть загружаемые даты.
+
+    Флаги полей меняются на уровне модели, поэтому пользоваться этим
+    можно только в однопоточной команде.
+    """
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Загрузка одного файла; итоги копятся в атрибутах."""
+
+    def __init__(self, batch_size=BATCH_SIZE, create_users=False):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.users = {}
+        self.groups = {}
+        # Переданы в bulk_create; из них записаны imported, остальные
+        # уже были в базе.
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.author_ids = set()
+        self.touched_posts = False
+
+    def _resolve_users(self, usernames):
+        missing = {name for name in usernames
+                   if name and name not in self.users}
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing).values_list('username', 'id'))
+        missing -= set(self.users)
+        if missing and self.create_users:
+            User.objects.bulk_create([
+                User(username=name, password=make_password(None))
+                for name in missing
+            ], ignore_conflicts=True)
+            self.users.update(User.objects.filter(
+                username__in=missing).values_list('username', 'id'))
+
+    def _resolve_groups(self, slugs):
+        missing = {slug for slug in slugs
+                   if slug and slug not in self.groups}
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list('slug', 'id'))
+
+    def _date(self, value):
+        if not value:
+            return timezone.now()
+        return parse_datetime(value) if isinstance(value, str) else value
+
+    def _id(self, row):
+        return int(row['id']) if row.get('id') else None
+
+    def build_groups(self, rows):
+        return [Group(id=self._id(row), title=row['title'],
+                      slug=row['slug'],
+                      description=row.get('description', ''))
+                for row in rows]
+
+    def build_posts(self, rows):
+        self._resolve_users(row.get('author__username') for row in rows)
+        self._resolve_groups(row.get('group__slug') for row in rows)
+        posts = []
+        for row in rows:
+            author_id = self.users.get(row.get('author__username'))
+            if author_id is None:
+                continue
+            pub_date = self._date(row.get('pub_date'))
+            posts.append(Post(
+                id=self._id(row), author_id=author_id,
+                group_id=self.groups.get(row.get('group__slug')),
+                text=row['text'], image=row.get('image') or '',
+                pub_date=pub_date, updated=pub_date))
+            self.author_ids.add(author_id)
+        return posts
+
+    def build_comments(self, rows):
+        self._resolve_users(row.get('author__username') for row in rows)
+        post_ids = set(Post.objects.filter(
+            pk__in={int(row['post_id']) for row in rows}
+        ).values_list('pk', flat=True))
+        return [
+            Comment(id=self._id(row), post_id=int(row['post_id']),
+                    author_id=self.users[row['author__username']],
+                    text=row['text'],
+                    pub_date=self._date(row.get('pub_date')))
+            for row in rows
+            if row.get('author__username') in self.users
+            and int(row['post_id']) in post_ids
+        ]
+
+    def build_follows(self, rows):
+        self._resolve_users(
+            name for row in rows
+            for name in (row.get('user__username'),
+                         row.get('author__username')))
+        follows = []
+        for row in rows:
+            user_id = self.users.get(row.get('user__username'))
+            author_id = self.users.get(row.get('author__username'))
+            if user_id is None or author_id is None or user_id == author_id:
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+            self.author_ids.add(author_id)
+        return follows
+
+    def run(self, kind, rows):
+        """Загружает строки kind пачками по batch_size."""
+        build = getattr(self, f'build_{kind}')
+        model = MODELS[kind]
+        self.touched_posts |= kind == 'posts'
+        rows = iter(rows)
+        before = model.objects.count()
+        with keep_dates(model):
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                objects = build(batch)
+                with transaction.atomic():
+                    # Строки с id можно загружать повторно: уже
+                    # существующие пропускаются.
+                    model.objects.bulk_create(objects, ignore_conflicts=True)
+                self.processed += len(objects)
+                self.skipped += len(batch) - len(objects)
+        # С ignore_conflicts bulk_create не сообщает, сколько строк
+        # записано на самом деле.
+        self.imported += model.objects.count() - before
+        self._reset_sequence(model)
+
+    def _reset_sequence(self, model):
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def finish(self):
+        """Делает то, что при обычном сохранении делают сигналы."""
+        with transaction.atomic():
+            counters.reconcile()
+        if self.touched_posts:
+            search.get_backend().rebuild()
+            pending = Post.objects.exclude(image='').filter(
+                thumbnails_ready=False).values_list('pk', flat=True)
+            for post_id in pending.iterator():
+                thumbnails.schedule(post_id)
+        if feed.is_enabled() and self.author_ids:
+            follows = Follow.objects.filter(
+                author__in=self.author_ids).values_list('user', 'author')
+            for user_id, author_id in follows.iterator():
+                feed.backfill(user_id, author_id)
+        bump_cache_version(COUNT_NAMESPACE)
+        bump_cache_version('index_page')
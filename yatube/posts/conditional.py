@@ -0,0 +1,122 @@
+"""Условные GET-запросы к лентам и страницам постов.
+
+Состояние ленты — время её последнего изменения, которое хранится
+в кеше и обновляется сигналами при сохранении и удалении постов,
+групп, подписок и пользователей (touch_feeds). Запрос к базе для
+этого не нужен, а страница поста берёт состояние одним запросом по
+первичному ключу. Из состояния получаются ETag и Last-Modified, и на
+повторный запрос с If-None-Match или If-Modified-Since браузер или
+прокси получает 304 без сборки страницы.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import Group, Post
+
+# Меняется при массовых изменениях (импорт, пересчёт счётчиков)
+# и делает устаревшими все ленты сразу.
+ALL_FEEDS = 'all'
+
+
+def _feed_key(feed):
+    return f'feed_modified:{feed}'
+
+
+def touch_feeds(*feeds):
+    """Отмечает ленты изменёнными: 'index', 'group:<slug>',
+    'profile:<username>' или ALL_FEEDS."""
+    now = timezone.now()
+    cache.set_many({_feed_key(feed): now for feed in feeds}, None)
+
+
+def group_feeds(*group_ids):
+    """Имена лент групп с этими id для touch_feeds."""
+    group_ids = set(group_ids) - {None}
+    if not group_ids:
+        return []
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    return [f'group:{slug}' for slug in slugs]
+
+
+def author_feeds(user_id):
+    """Ленты, где видны посты автора: главная и его группы."""
+    slugs = Group.objects.filter(posts__author_id=user_id).values_list(
+        'slug', flat=True).distinct()
+    return ['index', *(f'group:{slug}' for slug in slugs)]
+
+
+def feed_modified(feed):
+    """Время последнего изменения ленты.
+
+    Если в кеше его нет (кеш очищен или запись вытеснена), лента
+    считается изменённой сейчас: это лишний ответ 200, но не
+    устаревший 304.
+    """
+    keys = [_feed_key(ALL_FEEDS), _feed_key(feed)]
+    known = cache.get_many(keys)
+    for key in keys:
+        if key not in known:
+            cache.add(key, timezone.now(), None)
+            known[key] = cache.get(key)
+    return max(filter(None, known.values()), default=timezone.now())
+
+
+def _feed_state(feed):
+    modified = feed_modified(feed)
+    return {'modified': modified}, modified
+
+
+def index_state(request):
+    return _feed_state('index')
+
+
+def group_state(request, slug):
+    return _feed_state(f'group:{slug}')
+
+
+def profile_state(request, username):
+    return _feed_state(f'profile:{username}')
+
+
+def post_state(request, post_id):
+    state = Post.objects.filter(pk=post_id).values(
+        'updated', 'thumbnails_ready', 'comments_count',
+        'author__username', 'author__first_name', 'author__last_name',
+        'author__stats__posts_count', 'group__slug', 'group__title',
+    ).annotate(latest_comment=Max('comments__pub_date')).first()
+    if state is None:
+        return None, None
+    return state, max(filter(None, (state['updated'],
+                                    state['latest_comment'])))
+
+
+def conditional_page(state_func):
+    """condition() с ETag и Last-Modified из state_func.
+
+    state_func(request, *args, **kwargs) возвращает (состояние,
+    время изменения); (None, None) — страницы нет, и view сам
+    ответит 404. В ETag входит ещё адрес с параметрами: от него
+    зависит номер страницы. Пользователь не входит: персональные
+    части страниц загружаются отдельно (см. posts/fragments.py).
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = state_func(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        values = state(request, *args, **kwargs)[0]
+        if values is None:
+            return None
+        raw = repr((request.get_full_path(), sorted(values.items())))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        return state(request, *args, **kwargs)[1]
+
+    return condition(etag, last_modified)
@@ -0,0 +1,65 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через F()-выражения из сигналов моделей.
+После массовых операций, которые обходят сигналы, их пересчитывает
+команда ``manage.py reconcile_counters``.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .conditional import ALL_FEEDS, touch_feeds
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _add(queryset, **deltas):
+    # Greatest не даёт счётчику уйти в минус, если он уже разошёлся
+    # с данными после массовых операций.
+    queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()})
+
+
+def add_user_stats(user_id, **deltas):
+    # Строки нет — значит счётчики ещё не читались и будут посчитаны
+    # целиком при первом обращении.
+    _add(UserStats.objects.filter(user_id=user_id), **deltas)
+
+
+def add_many_user_stats(user_ids, **deltas):
+    _add(UserStats.objects.filter(user_id__in=user_ids), **deltas)
+
+
+def add_group_posts(group_id, delta):
+    if group_id is not None:
+        _add(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def add_post_comments(post_id, delta):
+    _add(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def _count_of(model, field, ref='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(ref)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def reconcile():
+    """Пересчитывает все счётчики по данным таблиц."""
+    Post.objects.update(comments_count=_count_of(Comment, 'post'))
+    Group.objects.update(posts_count=_count_of(Post, 'group'))
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in missing.iterator()],
+        batch_size=1000)
+    UserStats.objects.update(
+        posts_count=_count_of(Post, 'author', 'user'),
+        followers_count=_count_of(Follow, 'author', 'user'),
+        following_count=_count_of(Follow, 'user', 'user'),
+    )
+    touch_feeds(ALL_FEEDS)
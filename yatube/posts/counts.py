@@ -0,0 +1,83 @@
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from core.cache import get_cache_version, single_flight
+
+COUNT_NAMESPACE = 'posts_count'
+COUNT_CACHE_TIMEOUT: int = 60 * 15
+
+
+def estimated_count(model, using='default'):
+    """Оценка числа строк таблицы по статистике СУБД или None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ('SELECT reltuples::bigint FROM pg_class '
+                       'WHERE oid = %s::regclass'),
+        'mysql': ('SELECT table_rows FROM information_schema.tables '
+                  'WHERE table_schema = DATABASE() AND table_name = %s'),
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }
+    sql = queries.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    try:
+        estimate = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    return estimate if estimate >= 0 else None
+
+
+def _count_key(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+    return (f'{COUNT_NAMESPACE}:{get_cache_version(COUNT_NAMESPACE)}:'
+            f'{digest}')
+
+
+def cached_count(queryset):
+    """Число объектов выборки с кешированием до изменения постов.
+
+    Для выборки без условий (вся таблица) при заданном
+    POSTS_COUNT_ESTIMATE_THRESHOLD используется оценка из статистики
+    СУБД, если она не меньше порога.
+    """
+    key = _count_key(queryset)
+    if key is None:
+        return 0
+
+    def count():
+        threshold = settings.POSTS_COUNT_ESTIMATE_THRESHOLD
+        if threshold is not None and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return queryset.count()
+
+    return single_flight(key, count, COUNT_CACHE_TIMEOUT)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт количество объектов из cached_count."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return cached_count(self.object_list)
+        return len(self.object_list)
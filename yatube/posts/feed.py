@@ -0,0 +1,115 @@
+"""Лента подписок с материализацией при публикации (fan-out-on-write).
+
+При FOLLOW_FEED_MATERIALIZED = True новый пост сразу раскладывается
+по лентам подписчиков автора (таблица FeedEntry), и страница
+«Избранные авторы» читает одну ленту по индексу (user, -pub_date).
+Посты авторов, у которых подписчиков больше FOLLOW_FEED_FANOUT_LIMIT,
+не раскладываются, а подмешиваются при чтении (fan-out-on-read). Когда
+автор опускается до порога, его посты раскладываются заново (refill).
+Для существующей базы ленты заполняет ``manage.py fill_follow_feed``.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Post, UserStats
+
+BATCH_SIZE: int = 1000
+
+
+def is_enabled():
+    return settings.FOLLOW_FEED_MATERIALIZED
+
+
+def is_fanned_out(author):
+    followers = UserStats.objects.for_user(author).followers_count
+    return followers <= settings.FOLLOW_FEED_FANOUT_LIMIT
+
+
+def _bulk_add(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id).values_list('user_id', flat=True)
+    _bulk_add(
+        FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Переносит последние посты автора в ленту нового подписчика."""
+    if not is_fanned_out(author_id):
+        return
+    posts = Post.objects.filter(author=author_id).values_list(
+        'id', 'pub_date')[:settings.FOLLOW_FEED_BACKFILL]
+    _bulk_add(
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def refill(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков.
+
+    Нужно, когда подписчиков у автора снова стало не больше
+    FOLLOW_FEED_FANOUT_LIMIT: его посты, опубликованные без раскладки,
+    больше не подмешиваются при чтении и иначе пропали бы из лент.
+    """
+    posts = list(Post.objects.filter(author=author_id).values_list(
+        'id', 'pub_date')[:settings.FOLLOW_FEED_BACKFILL])
+    followers = Follow.objects.filter(
+        author=author_id).values_list('user_id', flat=True)
+    _bulk_add(
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in followers.iterator()
+        for post_id, pub_date in posts
+    )
+
+
+def fill():
+    """Раскладывает посты всех авторов, на которых подписаны, по
+    лентам их подписчиков; возвращает число авторов.
+
+    Нужно при включении FOLLOW_FEED_MATERIALIZED на базе, где подписки
+    уже есть. Уже разложенные записи пропускаются.
+    """
+    authors = Follow.objects.values_list('author', flat=True).distinct()
+    filled = 0
+    for author_id in authors.iterator():
+        if is_fanned_out(author_id):
+            refill(author_id)
+            filled += 1
+    return filled
+
+
+def trim(user_id, *author_ids):
+    """Убирает посты авторов из ленты отписавшегося пользователя."""
+    FeedEntry.objects.filter(
+        user=user_id, post__author__in=author_ids).delete()
+
+
+def unfanned_authors(user):
+    """Авторы из подписок пользователя, чьи посты читаются при запросе."""
+    followed = Follow.objects.filter(user=user).values('author')
+    return UserStats.objects.filter(
+        user__in=followed,
+        followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT,
+    ).values_list('user', flat=True)
+
+
+def follow_feed(user):
+    """Посты авторов, на которых подписан пользователь."""
+    if not is_enabled():
+        return Post.objects.filter(author__following__user=user)
+    authors = list(unfanned_authors(user))
+    if not authors:
+        return Post.objects.filter(
+            feed_entries__user=user).order_by('-feed_entries__pub_date')
+    entries = FeedEntry.objects.filter(user=user).values('post')
+    return Post.objects.filter(Q(pk__in=entries) | Q(author__in=authors))
@@ -0,0 +1,80 @@
+"""Подписки на многих авторов одним запросом.
+
+Имена авторов разрешаются через кеш пользователей (posts/users.py),
+а подписки пишутся одним bulk_create(ignore_conflicts=True). Такая
+запись обходит сигналы Follow, поэтому счётчики, материализованная
+лента и кеши обновляются пачкой в record_follows() — той же функцией,
+которую для одной подписки вызывает сигнал post_save. Если два запроса
+одновременно подпишут на одного автора, счётчики разойдутся на
+единицу; их выравнивает ``manage.py reconcile_counters``. Отписка —
+обычный delete(), и всё это делают сигналы.
+"""
+from django.db import transaction
+
+from core.cache import bump_cache_version
+from . import counters, feed, users
+from .conditional import touch_feeds
+from .counts import COUNT_NAMESPACE
+from .models import Follow
+
+# Сколько авторов можно передать в одном запросе.
+MAX_BATCH: int = 100
+
+
+def resolve_authors(usernames):
+    """{имя: id} для существующих пользователей из списка."""
+    return {username: user.pk
+            for username, user in users.get_users(usernames).items()}
+
+
+def followed_author_ids(user, author_ids):
+    """Id авторов из author_ids, на которых подписан user."""
+    if not user.is_authenticated or not author_ids:
+        return set()
+    return set(Follow.objects.filter(
+        user=user, author__in=author_ids).values_list('author', flat=True))
+
+
+def record_follows(user, authors):
+    """Обновляет счётчики, ленты и кеши после новых подписок user
+    на authors ({имя: id})."""
+    # Счётчики раньше ленты: лента при первом обращении создаёт строку
+    # UserStats с уже учтённой подпиской.
+    counters.add_user_stats(user.pk, following_count=len(authors))
+    counters.add_many_user_stats(authors.values(), followers_count=1)
+    if feed.is_enabled():
+        for author_id in authors.values():
+            feed.backfill(user.pk, author_id)
+    bump_cache_version(COUNT_NAMESPACE)
+    # На профилях видно число подписчиков и подписок.
+    touch_feeds(f'profile:{user.username}',
+                *(f'profile:{name}' for name in authors))
+
+
+def follow_many(user, usernames):
+    """Подписывает user на авторов; возвращает имена новых подписок."""
+    authors = resolve_authors(usernames)
+    authors.pop(user.username, None)
+    with transaction.atomic():
+        existing = followed_author_ids(user, list(authors.values()))
+        new = {name: pk for name, pk in authors.items()
+               if pk not in existing}
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=pk) for pk in new.values()],
+            ignore_conflicts=True)
+        if new:
+            record_follows(user, new)
+    return sorted(new)
+
+
+def unfollow_many(user, usernames):
+    """Отписывает user от авторов; возвращает имена снятых подписок."""
+    authors = resolve_authors(usernames)
+    with transaction.atomic():
+        existing = followed_author_ids(user, list(authors.values()))
+        removed = {name: pk for name, pk in authors.items()
+                   if pk in existing}
+        if removed:
+            Follow.objects.filter(
+                user=user, author__in=removed.values()).delete()
+    return sorted(removed)
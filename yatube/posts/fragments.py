@@ -0,0 +1,97 @@
+"""Персональные части публичных страниц.
+
+Страницы с public_page одинаковы для всех посетителей, поэтому их
+может кешировать прокси: шаблон не трогает сессию, пользователя
+и CSRF-токен. Вместо меню пользователя, кнопки подписки и формы
+комментария тег {% fragment %} оставляет заглушку, а скрипт из
+includes/fragments_script.html заполняет все заглушки страницы одним
+запросом к posts:fragments. На остальных страницах тег сразу
+отрисовывает фрагмент на месте.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control
+
+from .follows import followed_author_ids
+from .forms import CommentForm
+from .models import Post
+from .users import get_user
+
+FRAGMENTS = {}
+
+
+def fragment(name, template):
+    """Регистрирует фрагмент: функция по запросу и аргументу заглушки
+    возвращает контекст шаблона или None, если показывать нечего."""
+    def decorator(func):
+        FRAGMENTS[name] = (template, func)
+        return func
+    return decorator
+
+
+def render_fragment(request, name, arg):
+    template, get_context = FRAGMENTS[name]
+    context = get_context(request, arg)
+    if context is None:
+        return ''
+    return render_to_string(template, context, request)
+
+
+def public_page(view):
+    """Страница без персональных частей, которую можно кешировать
+    в общих кешах; браузер каждый раз сверяет её по ETag."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.public_page = True
+        response = view(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            patch_cache_control(
+                response, public=True, max_age=0,
+                s_maxage=settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+@fragment('header', 'includes/header_user.html')
+def header(request, path):
+    try:
+        view_name = resolve(path).view_name
+    except Resolver404:
+        view_name = None
+    return {'view_name': view_name}
+
+
+@fragment('switcher', 'includes/switcher.html')
+def switcher(request, active):
+    return {active: True} if request.user.is_authenticated else None
+
+
+@fragment('follow', 'includes/follow_button.html')
+def follow(request, username):
+    if not request.user.is_authenticated:
+        return None
+    author = get_user(username)
+    if author is None or author == request.user:
+        return None
+    return {'author': author,
+            'following': bool(followed_author_ids(request.user,
+                                                  [author.pk]))}
+
+
+@fragment('post_edit', 'includes/post_edit_button.html')
+def post_edit(request, post_id):
+    if not request.user.is_authenticated or not post_id.isdigit():
+        return None
+    if not Post.objects.filter(pk=post_id, author=request.user).exists():
+        return None
+    return {'post_id': post_id}
+
+
+@fragment('comment_form', 'includes/comment_form.html')
+def comment_form(request, post_id):
+    if not request.user.is_authenticated or not post_id.isdigit():
+        return None
+    return {'post_id': post_id, 'form': CommentForm()}
@@ -0,0 +1,112 @@
+"""Обработка картинок постов при загрузке.
+
+Новая картинка уменьшается до POST_IMAGE_MAX_SIZE по большей стороне,
+из неё убираются EXIF и другие метаданные, а рядом сохраняется копия
+в первом из POST_IMAGE_FORMATS, который умеет записывать Pillow.
+Размеры картинки записываются в пост, чтобы шаблонам не приходилось
+открывать файл. Компактная копия отдаётся на странице поста и служит
+исходником для миниатюр (см. posts/thumbnails.py).
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'AVIF': 'avif',
+    'WEBP': 'webp',
+    'JPEG': 'jpg',
+    'PNG': 'png',
+}
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+}
+# Ключи Image.info, в которых Pillow отдаёт метаданные файла.
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment')
+
+
+def compact_format():
+    """Первый формат из POST_IMAGE_FORMATS, доступный в Pillow."""
+    Image.init()
+    for image_format in settings.POST_IMAGE_FORMATS:
+        if image_format in Image.SAVE:
+            return image_format
+    return None
+
+
+def mime_type(name):
+    """MIME-тип файла картинки по расширению или None."""
+    return MIME_TYPES.get(os.path.splitext(name)[1][1:].lower())
+
+
+def _writable_format(image, source_format):
+    # Pillow читает больше форматов, чем пишет (XPM, PSD, SUN...):
+    # такие картинки пересохраняются в PNG, а без прозрачности в JPEG.
+    Image.init()
+    if source_format in Image.SAVE:
+        return source_format
+    if image.mode in ('RGBA', 'LA', 'P') or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def _encode(image, image_format):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=settings.POST_IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def ingest(post):
+    """Обрабатывает только что загруженную картинку поста.
+
+    Файл заменяется уменьшенной копией без метаданных лишь тогда,
+    когда это нужно: картинки, которые уже в порядке, и анимация
+    сохраняются как есть.
+    """
+    upload = post.image
+    upload.seek(0)
+    try:
+        with Image.open(upload) as source:
+            # Многокадровый JPEG с камер Pillow пишет только как JPEG.
+            source_format = ('JPEG' if source.format == 'MPO'
+                             else source.format)
+            animated = getattr(source, 'is_animated', False)
+            has_metadata = any(key in source.info for key in METADATA_KEYS)
+            image = source if animated else ImageOps.exif_transpose(source)
+            max_size = settings.POST_IMAGE_MAX_SIZE
+            oversized = max(image.size) > max_size
+            if not animated:
+                image.thumbnail((max_size, max_size), Image.LANCZOS)
+            post.image_width, post.image_height = image.size
+            if animated:
+                return
+            stem = os.path.splitext(os.path.basename(upload.name))[0]
+            if oversized or has_metadata:
+                image_format = _writable_format(image, source_format)
+                name = os.path.basename(upload.name)
+                if image_format != source_format:
+                    name = f'{stem}.{EXTENSIONS[image_format]}'
+                post.image = ContentFile(_encode(image, image_format),
+                                         name=name)
+            image_format = compact_format()
+            if image_format:
+                post.image_compact = ContentFile(
+                    _encode(image, image_format),
+                    name=f'{stem}.{EXTENSIONS[image_format]}')
+    except (OSError, KeyError, ValueError, Image.DecompressionBombError):
+        logger.warning('Не удалось обработать картинку %s', upload.name,
+                       exc_info=True)
+    finally:
+        upload.seek(0)
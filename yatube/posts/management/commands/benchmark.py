@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Заполняет отдельную тестовую базу данными и замеряет '
+            'задержки, SQL-запросы и память публичных страниц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Запросов к каждой странице.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--memory-samples', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--views', nargs='+', choices=benchmark.VIEWS,
+                            default=list(benchmark.VIEWS))
+        parser.add_argument('--json', dest='json_path',
+                            help='Сохранить итоги в JSON для сравнения '
+                                 'между прогонами.')
+
+    def handle(self, *args, **options):
+        # Рабочая база не трогается: прогон идёт в тестовой. Реплики
+        # смотрят в рабочие копии базы, поэтому чтение с них отключено.
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(DEBUG=False, DATABASE_REPLICAS=[]):
+                summaries = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(benchmark.report(summaries))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(summaries, output, indent=2)
+
+    def run_benchmark(self, options):
+        benchmark.generate(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'], seed=options['seed'])
+        driver = benchmark.Driver(seed=options['seed'])
+        return [
+            benchmark.summarize(driver.run(
+                view, options['requests'], options['warmup'],
+                options['memory_samples']))
+            for view in options['views']
+        ]
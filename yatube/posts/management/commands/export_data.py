@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии или подписки в NDJSON '
+            'или CSV с постоянным расходом памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(export.EXPORTS))
+        parser.add_argument('--format', dest='export_format',
+                            choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--after', help='Курсор последней выгруженной '
+                                            'строки, чтобы продолжить.')
+        parser.add_argument('--batch-size', type=int,
+                            default=export.BATCH_SIZE)
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            lines = export.render(options['kind'], options['export_format'],
+                                  options['after'], options['batch_size'])
+        except ValueError as error:
+            raise CommandError(error)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
+        self.stderr.write(f'Выгрузка сохранена в {options["output"]}.')
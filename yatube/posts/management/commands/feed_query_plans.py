@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.feed import follow_feed
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import POST_PER_PAGE
+
+
+class Command(BaseCommand):
+    help = ('Печатает планы запросов (EXPLAIN) для лент постов, '
+            'чтобы сравнить их до и после изменения индексов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username',
+                            help='Автор для profile и follow_index.')
+        parser.add_argument('--slug', help='Группа для group_posts.')
+
+    def handle(self, *args, **options):
+        author = self._get(User, username=options['username'])
+        group = self._get(Group, slug=options['slug'])
+        post = Post.objects.filter(comments_count__gt=0).first() or (
+            Post.objects.first())
+        follower = (Follow.objects.filter(author=author)
+                    .values_list('user', flat=True).first())
+        reader = follower or author.pk
+        queries = {
+            'index': Post.objects.for_feed(),
+            'group_posts': group.posts.for_feed(),
+            'profile': author.posts.for_feed(),
+            'follow_index': follow_feed(reader).for_feed(),
+            'profile followers': Follow.objects.filter(author=author),
+            'post_detail comments': Comment.objects.filter(post=post),
+        }
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset[:POST_PER_PAGE].explain())
+            self.stdout.write('')
+
+    def _get(self, model, **lookup):
+        lookup = {key: value for key, value in lookup.items() if value}
+        obj = model.objects.filter(**lookup).order_by('pk').first()
+        if obj is None:
+            raise CommandError(f'Нет подходящих записей {model.__name__}.')
+        return obj
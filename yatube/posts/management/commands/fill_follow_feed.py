@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = ('Заполняет материализованную ленту подписок по уже '
+            'существующим подпискам (FOLLOW_FEED_MATERIALIZED).')
+
+    def handle(self, *args, **options):
+        filled = feed.fill()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты заполнены, авторов: {filled}.'))
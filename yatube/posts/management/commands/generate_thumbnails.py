@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Готовит миниатюры постов, для которых фоновая '
+            'подготовка не завершилась или ещё нет индекса миниатюр.')
+
+    def handle(self, *args, **options):
+        pending = (Post.objects.exclude(image='')
+                   .filter(Q(thumbnails_ready=False)
+                           | Q(thumbnails__isnull=True))
+                   .values_list('pk', flat=True))
+        done = 0
+        for post_id in pending.iterator():
+            thumbnails.generate(post_id)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {done}.'))
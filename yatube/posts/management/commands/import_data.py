@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulk_import, thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Загружает группы, посты, комментарии или подписки '
+            'из NDJSON или CSV пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(bulk_import.MODELS))
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='import_format',
+                            choices=bulk_import.FORMATS,
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--batch-size', type=int,
+                            default=bulk_import.BATCH_SIZE)
+        parser.add_argument('--create-users', action='store_true',
+                            help='Создавать отсутствующих пользователей '
+                                 'без пароля.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден.')
+        import_format = options['import_format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        importer = bulk_import.Importer(options['batch_size'],
+                                        options['create_users'])
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as stream:
+            importer.run(options['kind'],
+                         bulk_import.read_rows(stream, import_format))
+        elapsed = time.monotonic() - started
+        importer.finish()
+        # Дожидаемся миниатюр импортированных постов из пула потоков.
+        thumbnails.shutdown()
+        existing = importer.processed - importer.imported
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["kind"]}: загружено {importer.imported}, '
+            f'уже были {existing}, '
+            f'пропущено {importer.skipped} строк за {elapsed:.1f} с '
+            f'({importer.processed / max(elapsed, 1e-6):.0f} строк/с).'))
+        if importer.skipped and not options['create_users']:
+            self.stdout.write('Строки с неизвестными пользователями '
+                              'пропущены, см. --create-users.')
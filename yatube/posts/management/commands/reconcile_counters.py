@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев и подписок '
+            'после массовых операций.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            reconcile()
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_image_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostThumbnails',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='thumbnails', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('image', models.CharField(max_length=100, verbose_name='Исходная картинка')),
+                ('src', models.CharField(max_length=255, verbose_name='Основная миниатюра')),
+                ('srcset', models.TextField(verbose_name='Набор миниатюр')),
+            ],
+            options={
+                'verbose_name': 'Миниатюры поста',
+                'verbose_name_plural': 'Миниатюры постов',
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+from collections import Counter
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def tokenize(text):
+    return [term[:64] for term in
+            re.findall(r'\w+', text.lower().replace('ё', 'е'))]
+
+
+def build_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.values_list('id', 'text')
+    if fts5_available(connection):
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_post_fts USING fts5(text)')
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO posts_post_fts(rowid, text) VALUES (%s, %s)',
+                [(post_id, ' '.join(tokenize(text)))
+                 for post_id, text in posts.iterator()])
+        return
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post_id, text in posts.iterator():
+        terms = Counter(tokenize(text))
+        SearchTerm.objects.bulk_create([
+            SearchTerm(term=term, post_id=post_id, weight=weight)
+            for term, weight in terms.items()
+        ], ignore_conflicts=True)
+
+
+def drop_index(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_postthumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
@@ -6,16 +6,50 @@ from core.models import CreatedModel
 User = get_user_model()
 
 
-class Group(models.Model):
+class ManagedFieldsMixin:
+    """Не перезаписывает при сохранении загруженного объекта поля,
+    которые меняются только атомарными UPDATE: счётчики из
+    posts.counters и флаг готовности миниатюр из posts.thumbnails."""
+
+    managed_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and (
+                kwargs.get('update_fields') is None):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.managed_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(ManagedFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+
+    managed_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Post(CreatedModel):
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Посты для лент: автор и группа в одном запросе,
+        без неиспользуемых в карточке поста полей."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated', 'image', 'thumbnails_ready',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug', 'group__title')
+
+
+class Post(ManagedFieldsMixin, CreatedModel):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -42,11 +76,49 @@ class Post(CreatedModel):
         blank=True,
         help_text='Выберете изображение'
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_compact = models.ImageField(
+        'Картинка в компактном формате',
+        upload_to='posts/compact/',
+        blank=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0
+    )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы',
+        default=False
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    managed_fields = ('comments_count', 'thumbnails_ready')
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -74,6 +146,10 @@ class Comment(CreatedModel):
         ordering = ['-pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', '-pub_date'],
+                         name='comment_post_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -102,3 +178,120 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F("author")),
                 name='user_author_unique'),
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class UserStatsManager(models.Manager):
+
+    def for_user(self, user):
+        """Счётчики пользователя; при первом обращении считаются заново."""
+        stats = self.filter(user=user).first()
+        if stats is None:
+            stats, _ = self.get_or_create(
+                user_id=getattr(user, 'pk', user),
+                defaults=self.model.count_for(user))
+        return stats
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0)
+    following_count = models.PositiveIntegerField(
+        'Число подписок', default=0)
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    @staticmethod
+    def count_for(user):
+        return {
+            'posts_count': Post.objects.filter(author=user).count(),
+            'followers_count': Follow.objects.filter(author=user).count(),
+            'following_count': Follow.objects.filter(user=user).count(),
+        }
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='feed_user_pub_date_idx'),
+        ]
+
+
+class PostThumbnails(models.Model):
+    """Готовые миниатюры картинки поста: одна строка на пост."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Пост',
+        related_name='thumbnails'
+    )
+    image = models.CharField('Исходная картинка', max_length=100)
+    src = models.CharField('Основная миниатюра', max_length=255)
+    srcset = models.TextField('Набор миниатюр')
+
+    class Meta:
+        verbose_name = 'Миниатюры поста'
+        verbose_name_plural = 'Миниатюры постов'
+
+    def __str__(self) -> str:
+        return self.image
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса поиска: слово и пост, где оно есть."""
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='search_terms'
+    )
+    weight = models.PositiveIntegerField('Число вхождений', default=1)
+
+    class Meta:
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_term'),
+        ]
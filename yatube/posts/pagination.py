@@ -0,0 +1,202 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.http import urlencode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключа в строку для URL."""
+    raw = '|'.join([direction] + [str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор. Для битого курсора возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+    except (binascii.Error, ValueError):
+        return None
+    direction, *values = raw.split('|')
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return direction, values
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (pub_date, id) вместо OFFSET.
+
+    Каждая страница читается одним запросом с условием по ключу,
+    поэтому время ответа не зависит от глубины страницы, а COUNT(*)
+    не нужен вовсе.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def _key(self, obj):
+        values = []
+        for name in self.ordering:
+            if isinstance(obj, dict):
+                value = obj[name]
+            else:
+                value = getattr(obj, name)
+            values.append(value.isoformat()
+                          if hasattr(value, 'isoformat') else value)
+        return values
+
+    def _parse_key(self, values):
+        if len(values) != len(self.ordering):
+            return None
+        opts = self.object_list.model._meta
+        try:
+            return [opts.get_field(name).to_python(value)
+                    for name, value in zip(self.ordering, values)]
+        except ValidationError:
+            return None
+
+    def _seek(self, values, lookup):
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            equal = {field: value for field, value in zip(
+                self.ordering[:position], values)}
+            equal[f'{name}__{lookup}'] = values[position]
+            condition |= Q(**equal)
+        return self.object_list.filter(condition)
+
+    def _newest_first(self, queryset):
+        return queryset.order_by(*[f'-{name}' for name in self.ordering])
+
+    def get_page(self, cursor=None, params=None):
+        """Возвращает страницу по курсору; без курсора — первую."""
+        decoded = decode_cursor(cursor)
+        values = decoded and self._parse_key(decoded[1])
+        limit = self.per_page + 1
+        if not values:
+            rows = list(self._newest_first(self.object_list)[:limit])
+            return CursorPage(rows[:self.per_page], self,
+                              has_next=len(rows) > self.per_page,
+                              has_previous=False, params=params)
+        direction = decoded[0]
+        if direction == NEXT:
+            rows = list(self._newest_first(self._seek(values, 'lt'))[:limit])
+            if not rows:
+                return self.get_page(params=params)
+            return CursorPage(rows[:self.per_page], self,
+                              has_next=len(rows) > self.per_page,
+                              has_previous=True, params=params)
+        rows = list(self._seek(values, 'gt')
+                    .order_by(*self.ordering)[:limit])
+        if len(rows) <= self.per_page:
+            return self.get_page(params=params)
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(rows, self, has_next=True,
+                          has_previous=True, params=params)
+
+    def iterate(self, cursor=None):
+        """Все объекты от старых к новым пачками по per_page.
+
+        Вместе с объектом отдаётся курсор, по которому обход можно
+        продолжить сразу после него. Каждая пачка читается отдельным
+        запросом через iterator(), так что память не растёт с объёмом.
+        Битый курсор — ValueError сразу, а не обход с начала.
+        """
+        decoded = decode_cursor(cursor)
+        values = decoded and self._parse_key(decoded[1])
+        if cursor and not values:
+            raise ValueError(f'Неверный курсор: {cursor}')
+        return self._iterate(values)
+
+    def _iterate(self, values):
+        while True:
+            queryset = (self._seek(values, 'gt') if values
+                        else self.object_list)
+            rows = 0
+            for obj in (queryset.order_by(*self.ordering)[:self.per_page]
+                        .iterator(chunk_size=self.per_page)):
+                rows += 1
+                key = self._key(obj)
+                yield obj, encode_cursor(NEXT, key)
+            if rows < self.per_page:
+                return
+            values = self._parse_key(key)
+
+
+class CursorPage(Sequence):
+    """Страница курсорного пагинатора с интерфейсом как у Page."""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 params=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.params = params
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(NEXT, self.paginator._key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(PREVIOUS,
+                             self.paginator._key(self.object_list[0]))
+
+    def _url(self, cursor):
+        params = self.params.copy() if self.params is not None else {}
+        params.pop('cursor', None)
+        params.pop('page', None)
+        if cursor:
+            params['cursor'] = cursor
+        if hasattr(params, 'urlencode'):
+            query = params.urlencode()
+        else:
+            query = urlencode(params)
+        return f'?{query}' if query else '?'
+
+    @property
+    def first_url(self):
+        return self._url(None)
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self._has_next else None
+
+    @property
+    def previous_url(self):
+        return (self._url(self.previous_cursor)
+                if self._has_previous else None)
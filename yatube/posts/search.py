@@ -0,0 +1,234 @@
+"""Полнотекстовый поиск по постам.
+
+Индекс обновляется сигналами при сохранении и удалении поста.
+Бэкенд выбирается настройкой POSTS_SEARCH_BACKEND; по умолчанию на
+SQLite с FTS5 используется виртуальная таблица posts_post_fts,
+в остальных случаях — обратный индекс на модели SearchTerm.
+Перестроить индекс целиком: ``manage.py rebuild_search_index``.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils.module_loading import import_string
+
+from .models import Post, SearchTerm
+
+# Больше слов в запросе не учитываем: каждое — отдельное условие.
+MAX_QUERY_TERMS: int = 10
+TERM_MAX_LENGTH: int = SearchTerm._meta.get_field('term').max_length
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, «ё» приравнивается к «е».
+
+    FTS5 получает уже разобранный так текст: сам unicode61 «ё»
+    не сводит к «е».
+    """
+    return [term[:TERM_MAX_LENGTH] for term in
+            re.findall(r'\w+', text.lower().replace('ё', 'е'))]
+
+
+def query_terms(query):
+    """Различные слова запроса в исходном порядке."""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    """SQLite собран с FTS5, и миграция 0019 создала posts_post_fts.
+
+    Если FTS5 появился уже после миграции, индекс остаётся в SearchTerm.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        if ('ENABLE_FTS5',) not in cursor.fetchall():
+            return False
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'posts_post_fts'")
+        return cursor.fetchone() is not None
+
+
+class SearchResults:
+    """Ранжированная выдача для Paginator.
+
+    Срез читает из индекса id одной страницы, а затем сами посты
+    одним запросом к queryset, сохраняя порядок по релевантности.
+    """
+
+    def __init__(self, backend, terms, queryset):
+        self.backend = backend
+        self.terms = terms
+        self.queryset = queryset
+
+    def count(self):
+        return self.backend.count(self.terms) if self.terms else 0
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.terms:
+            return []
+        offset = index.start or 0
+        ids = self.backend.ranked_ids(self.terms, offset,
+                                      index.stop - offset)
+        posts = self.queryset.in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+class SearchBackend:
+    """Общий интерфейс бэкендов поиска."""
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def count(self, terms):
+        raise NotImplementedError
+
+    def ranked_ids(self, terms, offset, limit):
+        raise NotImplementedError
+
+    def restrict(self, queryset, terms):
+        """Оставляет в queryset посты со всеми словами terms."""
+        raise NotImplementedError
+
+    def search(self, query, queryset=None):
+        """Посты, подходящие под запрос, от самых релевантных."""
+        if queryset is None:
+            queryset = Post.objects.all()
+        return SearchResults(self, query_terms(query), queryset)
+
+    def filter(self, queryset, query):
+        """Сужает queryset до подходящих под запрос постов."""
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        return self.restrict(queryset, terms)
+
+
+class Fts5Backend(SearchBackend):
+    """Поиск через виртуальную таблицу FTS5 с ранжированием bm25."""
+
+    table = 'posts_post_fts'
+
+    def _match(self, terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def _insert(self, cursor, posts):
+        cursor.executemany(
+            f'INSERT INTO {self.table}(rowid, text) VALUES (%s, %s)',
+            ((post_id, ' '.join(tokenize(text))) for post_id, text in posts))
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s',
+                           [post.pk])
+            self._insert(cursor, [(post.pk, post.text)])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s',
+                           [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            self._insert(cursor, Post.objects.values_list(
+                'id', 'text').iterator())
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {self.table} '
+                f'WHERE {self.table} MATCH %s', [self._match(terms)])
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} '
+                f'WHERE {self.table} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def restrict(self, queryset, terms):
+        # pk__in=RawSQL(...) Django 2.2 оборачивает в двойные скобки,
+        # и SQLite считает подзапрос скалярным, поэтому extra().
+        return queryset.extra(
+            where=[f'{queryset.model._meta.db_table}.id IN ('
+                   f'SELECT rowid FROM {self.table} '
+                   f'WHERE {self.table} MATCH %s)'],
+            params=[self._match(terms)])
+
+
+class InvertedIndexBackend(SearchBackend):
+    """Обратный индекс в таблице SearchTerm для любой базы.
+
+    Пост подходит, если в нём есть все слова запроса; выше стоят
+    посты, где они встречаются чаще, при равенстве — более новые.
+    """
+
+    def _terms(self, post):
+        return [
+            SearchTerm(term=term, post_id=post.pk, weight=weight)
+            for term, weight in Counter(tokenize(post.text)).items()
+        ]
+
+    def index(self, post):
+        SearchTerm.objects.filter(post_id=post.pk).delete()
+        SearchTerm.objects.bulk_create(self._terms(post))
+
+    def remove(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def rebuild(self):
+        SearchTerm.objects.all().delete()
+        for post in Post.objects.only('text').iterator():
+            SearchTerm.objects.bulk_create(self._terms(post))
+
+    def _matches(self, terms):
+        return (SearchTerm.objects.filter(term__in=terms)
+                .values('post')
+                .annotate(matched=Count('term'), score=Sum('weight'))
+                .filter(matched=len(terms)))
+
+    def count(self, terms):
+        return self._matches(terms).count()
+
+    def ranked_ids(self, terms, offset, limit):
+        return list(self._matches(terms)
+                    .order_by('-score', '-post')
+                    .values_list('post', flat=True)[offset:offset + limit])
+
+    def restrict(self, queryset, terms):
+        return queryset.filter(pk__in=self._matches(terms).values('post'))
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    """Бэкенд поиска из POSTS_SEARCH_BACKEND или выбранный по базе."""
+    path = settings.POSTS_SEARCH_BACKEND
+    if path is None:
+        path = ('posts.search.Fts5Backend' if fts5_available()
+                else 'posts.search.InvertedIndexBackend')
+    return _load_backend(path)
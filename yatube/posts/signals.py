@@ -0,0 +1,237 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_cache_version
+from . import (conditional, counters, feed, follows, images, search,
+               thumbnails, users)
+from .counts import COUNT_NAMESPACE
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .utils import POST_CARDS_NAMESPACE, forget_post_card
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Follow)
+def invalidate_post_counts(sender, **kwargs):
+    bump_cache_version(COUNT_NAMESPACE)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_index_page(sender, update_fields=None, created=False,
+                          **kwargs):
+    # На главной имена авторов; новый пользователь её не меняет.
+    if sender is User and (created
+                           or not _changes_cached_user(update_fields)):
+        return
+    bump_cache_version('index_page')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_post_feeds(sender, instance, **kwargs):
+    conditional.touch_feeds(
+        'index', f'profile:{instance.author.username}',
+        *conditional.group_feeds(instance.group_id,
+                                 getattr(instance, '_saved_group_id',
+                                         None)))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_feeds(sender, instance, **kwargs):
+    # Лента API отдаёт число комментариев постов.
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'author__username', 'group__slug').first()
+    if post is None:
+        return
+    feeds = ['index', f'profile:{post["author__username"]}']
+    if post['group__slug']:
+        feeds.append(f'group:{post["group__slug"]}')
+    conditional.touch_feeds(*feeds)
+
+
+@receiver(pre_save, sender=Group)
+def remember_saved_slug(sender, instance, **kwargs):
+    if instance.pk is not None and not instance._state.adding:
+        instance._saved_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def touch_group_feeds(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_saved_slug', None)} - {None}
+    conditional.touch_feeds('index', *(f'group:{slug}' for slug in slugs))
+
+
+@receiver(post_delete, sender=Follow)
+def touch_follow_feeds(sender, instance, **kwargs):
+    # На профилях обоих видно число подписчиков и подписок.
+    conditional.touch_feeds(f'profile:{instance.user.username}',
+                            f'profile:{instance.author.username}')
+
+
+@receiver(pre_save, sender=Post)
+def ingest_image(sender, instance, **kwargs):
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_compact = ''
+    elif not instance.image._committed:
+        images.ingest(instance)
+
+
+# Счётчики подключены раньше ленты: лента при первом обращении создаёт
+# строку UserStats с уже учтённым изменением, и повторно его прибавлять
+# нельзя.
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, **kwargs):
+    if instance.pk is not None and not instance._state.adding:
+        (instance._saved_group_id, instance._saved_updated,
+         instance._saved_image) = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'updated', 'image')
+            .first() or (None, None, None))
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.add_user_stats(instance.author_id, posts_count=1)
+        counters.add_group_posts(instance.group_id, 1)
+        return
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    if saved_group_id != instance.group_id:
+        counters.add_group_posts(saved_group_id, -1)
+        counters.add_group_posts(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.add_user_stats(instance.author_id, posts_count=-1)
+    counters.add_group_posts(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.add_post_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.add_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def record_follow(sender, instance, created, **kwargs):
+    # Счётчики, лента, кеши: то же, что follow_many делает пачкой.
+    if created:
+        follows.record_follows(
+            instance.user, {instance.author.username: instance.author_id})
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.add_user_stats(instance.author_id, followers_count=-1)
+    counters.add_user_stats(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_card(sender, instance, created, **kwargs):
+    if not created:
+        forget_post_card(instance.pk,
+                         getattr(instance, '_saved_updated', None))
+
+
+@receiver(post_delete, sender=Post)
+def drop_post_card(sender, instance, **kwargs):
+    if 'updated' not in instance.get_deferred_fields():
+        forget_post_card(instance.pk, instance.updated)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_post_cards(sender, **kwargs):
+    # В карточках ссылка на группу по slug.
+    bump_cache_version(POST_CARDS_NAMESPACE)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created and feed.is_enabled():
+        feed.fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_feed(sender, instance, **kwargs):
+    if feed.is_enabled():
+        feed.trim(instance.user_id, instance.author_id)
+        # Счётчик уже уменьшен: автор только что опустился до порога.
+        followers = UserStats.objects.for_user(
+            instance.author_id).followers_count
+        if followers == settings.FOLLOW_FEED_FANOUT_LIMIT:
+            feed.refill(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, created, **kwargs):
+    if not instance.image:
+        return
+    if not created:
+        if instance.image.name == getattr(instance, '_saved_image', None):
+            return
+        Post.objects.filter(pk=instance.pk).update(thumbnails_ready=False)
+        instance.thumbnails_ready = False
+    thumbnails.schedule(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+def _changes_cached_user(update_fields):
+    # Вход пользователя сохраняет только last_login: кеш не трогаем.
+    return update_fields is None or bool(
+        set(update_fields) & set(users.FIELDS))
+
+
+@receiver(pre_save, sender=User)
+def remember_saved_username(sender, instance, update_fields, **kwargs):
+    if (instance.pk is not None and not instance._state.adding
+            and _changes_cached_user(update_fields)):
+        instance._saved_username = User.objects.filter(
+            pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, update_fields,
+                           **kwargs):
+    if _changes_cached_user(update_fields):
+        usernames = {instance.username,
+                     getattr(instance, '_saved_username', None)} - {None}
+        users.invalidate(*usernames)
+        feeds = [f'profile:{username}' for username in usernames]
+        if not created:
+            # Имя автора и ссылка на профиль есть в карточках постов
+            # на главной и в его группах.
+            feeds += conditional.author_feeds(instance.pk)
+            bump_cache_version(POST_CARDS_NAMESPACE)
+        conditional.touch_feeds(*feeds)
+
+
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    users.invalidate(instance.username)
+    conditional.touch_feeds(f'profile:{instance.username}')
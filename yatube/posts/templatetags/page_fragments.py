@@ -0,0 +1,18 @@
+from django import template
+from django.utils.html import format_html
+
+from posts.fragments import render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name, arg=''):
+    """Персональная часть страницы: на публичной странице — заглушка,
+    которую заполнит скрипт, на остальных — сразу фрагмент."""
+    request = context['request']
+    if getattr(request, 'public_page', False):
+        return format_html(
+            '<template data-fragment="{}" data-args="{}"></template>',
+            name, arg)
+    return render_fragment(request, name, str(arg))
@@ -0,0 +1,71 @@
+from django import template
+
+from core.cache import get_cache_version
+from posts import images, thumbnails
+from posts.models import Post
+from posts.utils import POST_CARDS_NAMESPACE
+
+register = template.Library()
+
+
+class ThumbnailIndex:
+    """Миниатюры постов страницы, загружаются при первом обращении.
+
+    Если все карточки страницы взяты из кеша фрагментов, запроса
+    не будет вовсе.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.entries = None
+
+    def get(self, post):
+        if self.entries is None:
+            self.entries = thumbnails.get_index(
+                [item.pk for item in self.posts if item.thumbnails_ready])
+        entry = self.entries.get(post.pk)
+        # Строка могла остаться от прежней картинки поста.
+        if entry and entry['image'] == post.image.name:
+            return entry
+        return None
+
+
+@register.simple_tag
+def thumbnail_index(posts):
+    """Индекс миниатюр для страницы постов или одного поста."""
+    if isinstance(posts, Post):
+        posts = [posts]
+    return ThumbnailIndex(posts)
+
+
+@register.simple_tag
+def post_card_version():
+    """Версия карточек постов для ключа {% cache %}."""
+    return get_cache_version(POST_CARDS_NAMESPACE)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, index, full=False):
+    """Картинка поста с srcset из индекса миниатюр.
+
+    С full=True картинка показывается целиком: компактная копия для
+    браузеров, которые её понимают, и оригинал с размерами из поста.
+    """
+    if full and post.image and post.image_width and post.image_height:
+        compact = post.image_compact
+        return {
+            'post': post,
+            'full': True,
+            'compact': compact,
+            'compact_type': compact and images.mime_type(compact.name),
+            'width': post.image_width,
+            'height': post.image_height,
+        }
+    width = thumbnails.DEFAULT_WIDTH
+    return {
+        'post': post,
+        'thumbnails': (index.get(post)
+                       if post.image and post.thumbnails_ready else None),
+        'width': width,
+        'height': thumbnails.thumbnail_height(width),
+    }
@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Comment, Follow, Post
+
+
+class BenchmarkTest(TestCase):
+    def test_generate_and_run(self):
+        """Генератор воспроизводим, а все страницы отвечают без ошибок."""
+        benchmark.generate(users=5, groups=2, posts=30, comments=20,
+                           follows=5, seed=1)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertTrue(Follow.objects.exists())
+
+        driver = benchmark.Driver(seed=1)
+        summaries = [
+            benchmark.summarize(driver.run(view, requests=3, warmup=1,
+                                           memory_samples=1))
+            for view in benchmark.VIEWS
+        ]
+        for summary in summaries:
+            with self.subTest(view=summary['view']):
+                self.assertEqual(summary['errors'], 0)
+                self.assertGreaterEqual(summary['p99_ms'],
+                                        summary['p50_ms'])
+        self.assertIn('p95_ms', benchmark.report(summaries))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, UserStats
+from posts.utils import COMMENT_PER_PAGE
+
+User = get_user_model()
+
+
+class CommentPagesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+        for number in range(COMMENT_PER_PAGE + 5):
+            Comment.objects.create(
+                post=cls.post, text=f'Комментарий {number}',
+                author=User.objects.create_user(username=f'user{number}'))
+        UserStats.objects.for_user(cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_first_page(self):
+        """На странице поста только первые, самые новые комментарии."""
+        response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENT_PER_PAGE)
+        self.assertEqual(comments[0].text,
+                         f'Комментарий {COMMENT_PER_PAGE + 4}')
+        self.assertContains(response, 'data-more-comments')
+
+    def test_more_comments_fragment(self):
+        """Остальные комментарии отдаются фрагментом по курсору."""
+        cursor = self.client.get(self.url).context['comments'].next_cursor
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': cursor})
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual([comment.text for comment
+                          in response.context['comments']],
+                         [f'Комментарий {number}'
+                          for number in range(4, -1, -1)])
+        self.assertNotContains(response, 'data-more-comments')
+
+    def test_authors_loaded_with_comments(self):
+        """Авторы комментариев не требуют отдельных запросов."""
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        with self.assertNumQueries(3):
+            self.client.get(url)
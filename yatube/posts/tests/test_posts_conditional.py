@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:posts', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_not_modified(self):
+        """Повтор запроса с ETag или Last-Modified получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('max-age=0', response['Cache-Control'])
+                etag, last_modified = (response['ETag'],
+                                       response['Last-Modified'])
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code,
+                    304)
+
+    def test_etag_changes_with_posts(self):
+        """Правка поста и новый пост меняют ETag всех страниц."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_deleted_post(self):
+        """Удаление поста меняет ETag ленты, хотя время изменения
+        остальных постов прежнее."""
+        url = reverse('posts:index')
+        Post.objects.create(author=self.user, text='Старый пост')
+        etag = self.client.get(url)['ETag']
+        Post.objects.filter(text='Старый пост').delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_group_and_follows(self):
+        """Правка группы и новая подписка меняют ETag своих лент."""
+        changes = (
+            (reverse('posts:posts', kwargs={'slug': 'group'}),
+             lambda: Group.objects.filter(pk=self.group.pk).first().save()),
+            (reverse('posts:profile', kwargs={'username': 'author'}),
+             lambda: Follow.objects.create(
+                 user=User.objects.create_user(username='reader'),
+                 author=self.user)),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_author_rename(self):
+        """Новое имя автора меняет ETag главной, его групп и постов."""
+        urls = (self.urls[0], self.urls[1], self.urls[3])
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'writer'
+        user.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_etag_changes_with_group(self):
+        """Новое название группы меняет ETag страницы поста."""
+        url = self.urls[3]
+        etag = self.client.get(url)['ETag']
+        Group.objects.filter(pk=self.group.pk).update(title='Другая')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_comments(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_page_only(self):
+        """Номер страницы входит в ETag, а пользователь — нет."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        etag = self.client.get(url)['ETag']
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        self.assertEqual(authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(
+            url + '?page=2', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_page(self):
+        """Для несуществующей группы по-прежнему 404."""
+        response = self.client.get(
+            reverse('posts:posts', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
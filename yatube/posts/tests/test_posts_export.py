@@ -0,0 +1,72 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_data', *args, '--batch-size', '2', stdout=out)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_command_resumes_from_cursor(self):
+        """Выгрузка идёт от старых к новым и продолжается по курсору."""
+        rows = self.export('posts')
+        self.assertEqual([row['id'] for row in rows],
+                         [post.id for post in self.posts])
+        self.assertEqual(rows[0]['author__username'], 'auth')
+        rest = self.export('posts', '--after', rows[2]['cursor'])
+        self.assertEqual(rest, rows[3:])
+        follows = self.export('follows')
+        self.assertEqual(follows[0]['user__username'], 'reader')
+
+    def test_invalid_cursor_rejected(self):
+        """Битый курсор — ошибка, а не выгрузка с начала."""
+        with self.assertRaises(CommandError):
+            self.export('posts', '--after', 'битый')
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(reverse('posts:export', args=['posts']),
+                              {'after': 'битый'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_streams_csv_to_staff(self):
+        """Выгрузка по HTTP доступна только сотрудникам."""
+        url = reverse('posts:export', args=['comments'])
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).status_code, 302)
+
+        client.force_login(self.staff)
+        response = client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], 'Комментарий')
+        self.assertEqual(
+            client.get(reverse('posts:export', args=['users'])).status_code,
+            404)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_FEED_MATERIALIZED=True)
+class MaterializedFeedTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_feed(self):
+        """При подписке старые посты автора попадают в ленту."""
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'author'}))
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_new_post_fans_out(self):
+        """Новый пост раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        Post.objects.create(author=self.other, text='Чужой')
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_unfollow_trims_feed(self):
+        """После отписки посты автора пропадают из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_request(self):
+        """Посты популярных авторов подмешиваются при чтении ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_hybrid_feed(self):
+        """Лента объединяет разложенные посты и посты популярных авторов."""
+        Follow.objects.create(user=self.other, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.other)
+        popular = Post.objects.create(author=self.author, text='Популярный')
+        regular = Post.objects.create(author=self.other, text='Обычный')
+        self.assertEqual(self.feed(), [regular, popular, self.old_post])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_refilled(self):
+        """Когда у автора снова мало подписчиков, его посты, вышедшие
+        без раскладки, возвращаются в ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        Follow.objects.filter(user=self.other).delete()
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_fill_command(self):
+        """Команда заполняет ленты подписок, сделанных до включения."""
+        with override_settings(FOLLOW_FEED_MATERIALIZED=False):
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        call_command('fill_follow_feed', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from posts.follows import follow_many, followed_author_ids, unfollow_many
+from posts.models import FeedEntry, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class BatchFollowTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+        for user in [cls.reader] + cls.authors:
+            UserStats.objects.for_user(user)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_follow_many(self):
+        """Подписки пишутся пачкой, счётчики обновляются."""
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        # Имена, savepoint, существующие, вставка, два счётчика, release.
+        with self.assertNumQueries(7):
+            followed = follow_many(
+                self.reader,
+                ['author0', 'author1', 'author2', 'reader', 'missing'])
+        self.assertEqual(followed, ['author1', 'author2'])
+        self.assertEqual(self.stats(self.reader).following_count, 3)
+        self.assertEqual(
+            [self.stats(author).followers_count for author in self.authors],
+            [1, 1, 1])
+        self.assertEqual(followed_author_ids(
+            self.reader, [author.pk for author in self.authors]),
+            {author.pk for author in self.authors})
+
+    def test_unfollow_many(self):
+        """Отписка снимает только существующие подписки, счётчики
+        уменьшаются."""
+        follow_many(self.reader, ['author0', 'author1'])
+        self.assertEqual(
+            unfollow_many(self.reader, ['author1', 'author2']), ['author1'])
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(self.stats(self.authors[1]).followers_count, 0)
+        self.assertEqual(list(Follow.objects.values_list(
+            'author__username', flat=True)), ['author0'])
+
+    @override_settings(FOLLOW_FEED_MATERIALIZED=True)
+    def test_materialized_feed(self):
+        """Лента подписок заполняется и чистится вместе с подписками."""
+        Post.objects.create(author=self.authors[0], text='Пост')
+        follow_many(self.reader, ['author0'])
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         1)
+        unfollow_many(self.reader, ['author0'])
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
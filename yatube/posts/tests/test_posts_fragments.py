@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class PublicPageTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_same_shell_for_everyone(self):
+        """Аноним и пользователь получают одну и ту же страницу
+        без персональных частей, которую можно кешировать в прокси."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                anonymous = self.client.get(url)
+                authorized = self.authorized_client.get(url)
+                self.assertEqual(anonymous.content, authorized.content)
+                self.assertNotContains(authorized, 'reader')
+                self.assertNotContains(authorized, 'csrfmiddlewaretoken')
+                self.assertContains(authorized, 'data-fragment="header"')
+                self.assertIn('public', authorized['Cache-Control'])
+                self.assertIn('s-maxage', authorized['Cache-Control'])
+                self.assertNotIn('Cookie', authorized.get('Vary', ''))
+
+    def test_fragments(self):
+        """Персональные части приходят одним запросом и не кешируются
+        в общих кешах."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.authorized_client.get(reverse('posts:fragments'), {
+            'header': '/', 'follow': 'author',
+            'comment_form': self.post.pk, 'post_edit': self.post.pk,
+        })
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        parts = response.json()
+        self.assertIn('Пользователь: reader', parts['header'])
+        self.assertIn('Отписаться', parts['follow'])
+        self.assertIn('csrfmiddlewaretoken', parts['comment_form'])
+        self.assertEqual(parts['post_edit'], '')
+
+    def test_anonymous_fragments(self):
+        """Анониму достаются только ссылки входа и регистрации."""
+        parts = self.client.get(reverse('posts:fragments'), {
+            'header': '/', 'follow': 'author', 'unknown': '1',
+        }).json()
+        self.assertIn('Войти', parts['header'])
+        self.assertEqual(parts['follow'], '')
+        self.assertNotIn('unknown', parts)
+
+    def test_private_page_renders_fragments_inline(self):
+        """На остальных страницах персональные части на месте."""
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, 'data-fragment')
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def jpeg_with_exif(size):
+    exif = Image.Exif()
+    exif[0x010f] = 'Camera'
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+def xpm(size):
+    width, height = size
+    rows = ''.join(f'"{"a" * width}",\n' for _ in range(height))
+    content = (f'/* XPM */\nstatic char *image[] = {{\n'
+               f'"{width} {height} 1 1",\n"a c #ff0000",\n{rows}}};\n')
+    return SimpleUploadedFile('image.xpm', content.encode(),
+                              content_type='image/x-xpixmap')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=100,
+                   POST_IMAGE_FORMATS=['PNG'])
+class ImageIngestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_large_image_downscaled_without_metadata(self):
+        """Большая картинка уменьшается, EXIF удаляется, размеры
+        записываются, рядом появляется компактная копия."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=jpeg_with_exif((400, 200)))
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+        self.assertTrue(post.image_compact.name.endswith('.png'))
+        with Image.open(post.image_compact) as image:
+            self.assertEqual(image.format, 'PNG')
+
+    def test_small_image_kept_and_cleared(self):
+        """Картинка без метаданных сохраняется как есть, а при удалении
+        картинки размеры сбрасываются."""
+        buffer = BytesIO()
+        Image.new('RGB', (10, 20), 'blue').save(buffer, 'PNG')
+        content = buffer.getvalue()
+        post = Post.objects.create(
+            author=self.user, text='Текст',
+            image=SimpleUploadedFile('small.png', content))
+        post.refresh_from_db()
+        self.assertEqual(post.image.read(), content)
+        self.assertEqual((post.image_width, post.image_height), (10, 20))
+
+        post.image = ''
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertFalse(post.image_compact)
+
+    def test_unwritable_format_saved_as_png(self):
+        """Формат, который Pillow только читает, пересохраняется в PNG."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=xpm((300, 2)))
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.png'))
+        with Image.open(post.image) as image:
+            self.assertEqual((image.format, image.size), ('PNG', (100, 1)))
+
+    def test_post_page_shows_compact_copy_with_size(self):
+        """Страница поста отдаёт компактную копию и размеры картинки."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=jpeg_with_exif((400, 200)))
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(
+            response, f'<source srcset="{post.image_compact.url}" '
+                      f'type="image/png">')
+        self.assertContains(response, 'width="100" height="50"')
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import thumbnails
+from posts.bulk_import import Importer
+from posts.models import Comment, Follow, Group, Post, UserStats
+from posts.search import get_backend
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.export_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        author = User.objects.create_user(username='auth')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        post = Post.objects.create(
+            author=author, group=group, text='Импортированный пост')
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+        Follow.objects.create(user=reader, author=author)
+        cls.pub_date = post.pub_date
+        for kind, export_format in (('groups', 'csv'), ('posts', 'ndjson'),
+                                    ('comments', 'csv'),
+                                    ('follows', 'ndjson')):
+            call_command('export_data', kind, '--format', export_format,
+                         '--output', cls.path(kind, export_format),
+                         stderr=StringIO())
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.export_dir, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def path(cls, kind, export_format):
+        return os.path.join(cls.export_dir, f'{kind}.{export_format}')
+
+    def load(self, kind, export_format, *args):
+        out = StringIO()
+        call_command('import_data', kind, self.path(kind, export_format),
+                     *args, stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно с датами и счётчиками."""
+        self.load('groups', 'csv')
+        output = self.load('posts', 'ndjson')
+        self.assertIn('пропущено 1', output)
+        self.assertFalse(Post.objects.exists())
+
+        self.load('posts', 'ndjson', '--create-users')
+        self.load('comments', 'csv', '--create-users')
+        self.load('follows', 'ndjson')
+        post = Post.objects.get()
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.group.slug, 'test-slug')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Group.objects.get().posts_count, 1)
+        stats = UserStats.objects.for_user(post.author)
+        self.assertEqual((stats.posts_count, stats.followers_count), (1, 1))
+        self.assertEqual(list(get_backend().search('импортированный')[:1]),
+                         [post])
+
+        output = self.load('posts', 'ndjson')
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertIn('загружено 0, уже были 1', output)
+        self.assertIn('строк/с', output)
+
+    def test_images_get_thumbnails(self):
+        """Для картинок загруженных постов готовятся миниатюры."""
+        User.objects.create_user(username='auth')
+        name = default_storage.save('posts/small.gif',
+                                    ContentFile(SMALL_GIF))
+        self.addCleanup(default_storage.delete, name)
+        importer = Importer()
+        importer.run('posts', [{'author__username': 'auth',
+                                'text': 'С картинкой', 'image': name}])
+        with mock.patch.object(thumbnails, 'schedule', thumbnails.generate):
+            importer.finish()
+        post = Post.objects.get()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertEqual((post.image_width, post.image_height), (1, 1))
+        self.assertEqual(importer.imported, 1)
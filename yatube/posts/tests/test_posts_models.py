@@ -1,6 +1,9 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
-from posts.models import Post, Group
+from posts.models import Post, Group, Comment, Follow, UserStats
 
 
 User = get_user_model()
@@ -58,3 +61,62 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        stats = UserStats.objects.for_user(self.user)
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        stats.refresh_from_db()
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.for_user(self.reader).following_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.group = None
+        post.save()
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        stats.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+        post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда пересчитывает счётчики после массовых операций."""
+        stats = UserStats.objects.for_user(self.user)
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Текст', group=self.group)
+            for _ in range(3)
+        ])
+        call_command('reconcile_counters', stdout=StringIO())
+        stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
@@ -0,0 +1,87 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import InvertedIndexBackend, get_backend, fts5_available
+from posts.utils import POST_PER_PAGE
+
+User = get_user_model()
+
+
+class SearchMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Ёжик в тумане')
+        cls.often = Post.objects.create(
+            author=cls.user, text='ежик ежик и ещё раз ежик в тумане')
+        cls.other = Post.objects.create(
+            author=cls.user, text='Совсем другой текст')
+        for number in range(5):
+            Post.objects.create(
+                author=cls.user, text=f'Посторонний пост {number}')
+
+    def search(self, query):
+        return list(get_backend().search(query)[:POST_PER_PAGE])
+
+    def test_ranked_results(self):
+        """Находятся посты со всеми словами, чаще упомянутые — выше."""
+        self.assertEqual(self.search('ежик туман'), [])
+        self.assertCountEqual(self.search('Ежик тумане'),
+                              [self.often, self.rare])
+        self.assertEqual(self.search('ежик'), [self.often, self.rare])
+        self.assertEqual(get_backend().search('ежик').count(), 2)
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Теперь и тут ежик'
+        other.save()
+        self.assertIn(other, self.search('ежик'))
+        Post.objects.get(pk=self.often.pk).delete()
+        self.assertCountEqual(self.search('ежик'), [other, self.rare])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты."""
+        response = Client().get(reverse('posts:search'), {'q': 'другой'})
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        self.assertEqual(response.context['query'], 'другой')
+
+    def test_admin_search(self):
+        """Поиск в админке идёт через индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/posts/post/', {'q': 'тумане'})
+        self.assertCountEqual(response.context['cl'].result_list,
+                              [self.often, self.rare])
+
+
+@override_settings(POSTS_SEARCH_BACKEND='posts.search.InvertedIndexBackend')
+class InvertedIndexSearchTest(SearchMixin, TestCase):
+    pass
+
+
+@override_settings(POSTS_SEARCH_BACKEND='posts.search.Fts5Backend')
+class Fts5SearchTest(SearchMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not fts5_available():
+            raise unittest.SkipTest('SQLite собран без FTS5')
+        super().setUpClass()
+
+    def test_missing_table_falls_back(self):
+        """Без таблицы posts_post_fts поиск идёт по SearchTerm."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE posts_post_fts')
+        fts5_available.cache_clear()
+        self.addCleanup(fts5_available.cache_clear)
+        with override_settings(POSTS_SEARCH_BACKEND=None):
+            self.assertIsInstance(get_backend(), InvertedIndexBackend)
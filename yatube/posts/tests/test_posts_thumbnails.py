@@ -0,0 +1,137 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, PostThumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF,
+                content_type='image/gif'),
+        )
+
+    def test_placeholder_until_thumbnails_ready(self):
+        """Пока миниатюры готовятся, вместо картинки выводится заглушка."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(self.post.thumbnails_ready)
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertNotContains(response, '<img class="card-img')
+
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnails_ready)
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, '<img class="card-img')
+        self.assertContains(response, 'srcset=')
+
+    def test_new_image_resets_ready_flag(self):
+        """Замена картинки снова ставит пост в очередь."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.image = SimpleUploadedFile(
+            name='other.gif', content=SMALL_GIF, content_type='image/gif')
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.thumbnails_ready)
+
+    def test_index_read_in_one_query(self):
+        """Индекс миниатюр страницы читается одним запросом,
+        а затем берётся из кеша."""
+        other = Post.objects.create(
+            author=self.user, text='Ещё пост',
+            image=SimpleUploadedFile(
+                name='other.gif', content=SMALL_GIF,
+                content_type='image/gif'))
+        thumbnails.generate(self.post.pk)
+        thumbnails.generate(other.pk)
+        self.assertEqual(PostThumbnails.objects.count(), 2)
+        cache.clear()
+        with self.assertNumQueries(1):
+            entries = thumbnails.get_index([self.post.pk, other.pk])
+        self.assertIn('480w', entries[other.pk]['srcset'])
+        with self.assertNumQueries(0):
+            thumbnails.get_index([self.post.pk, other.pk])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailWorkersTest(TransactionTestCase):
+    # Без обёртки в транзакцию: on_commit срабатывает сразу,
+    # и миниатюры готовятся в потоках пула.
+
+    def tearDown(self):
+        thumbnails.shutdown()
+        super().tearDown()
+
+    def create_post(self):
+        user = User.objects.create_user(username='worker')
+        return Post.objects.create(
+            author=user, text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF,
+                content_type='image/gif'))
+
+    def test_pool_generates_thumbnails(self):
+        """Пул готовит миниатюры после фиксации транзакции."""
+        post = self.create_post()
+        thumbnails.shutdown()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertTrue(PostThumbnails.objects.filter(post=post).exists())
+
+    @mock.patch.object(thumbnails, 'RETRY_DELAY', 0)
+    def test_locked_database_retried(self):
+        """Занятая база не теряет миниатюры: генерация повторяется."""
+        generate = thumbnails.generate
+        calls = []
+
+        def flaky(post_id):
+            calls.append(post_id)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            generate(post_id)
+
+        with mock.patch.object(thumbnails, 'generate', flaky):
+            post = self.create_post()
+            thumbnails.shutdown()
+        post.refresh_from_db()
+        self.assertEqual(calls, [post.pk, post.pk])
+        self.assertTrue(post.thumbnails_ready)
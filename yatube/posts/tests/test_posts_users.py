@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import users
+from posts.models import UserStats
+
+User = get_user_model()
+
+
+class UserCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия')
+        UserStats.objects.for_user(cls.author)
+
+    def setUp(self):
+        cache.clear()
+        users.clear_local()
+
+    def test_lookup_is_cached(self):
+        """Повторные обращения не ходят в базу ни из процесса, ни из
+        общего кеша."""
+        with self.assertNumQueries(1):
+            users.get_users(['author', 'missing'])
+        with self.assertNumQueries(0):
+            author = users.get_user('author')
+        self.assertEqual(author.pk, self.author.pk)
+        self.assertEqual(author.get_full_name(), 'Имя Фамилия')
+        users.clear_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(users.get_user('author'), self.author)
+
+    def test_invalidated_on_save(self):
+        """Переименование и правка пользователя сбрасывают кеш."""
+        users.get_user('author')
+        self.author.first_name = 'Новое'
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertIsNone(users.get_user('author'))
+        self.assertEqual(users.get_user('renamed').first_name, 'Новое')
+
+    def test_profile_uses_cache(self):
+        """Профиль с тёплым кешем не ищет автора в auth_user."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['author'], self.author)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'missing'}))
+        self.assertEqual(response.status_code, 404)
@@ -8,9 +8,15 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
 
+from core.cache import get_cache_version
+from core.templatetags.paginator_tags import page_window
+from posts.counts import cached_count
 from posts.forms import PostForm
-from posts.models import Post, Group, Comment
+from posts.models import Post, Group, Comment, Follow, UserStats
+from posts.utils import POST_CARDS_NAMESPACE, POST_PER_PAGE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -92,16 +98,41 @@ class PostPagesTests(TestCase):
         self.assertIsInstance(response.context['page_obj'][0], Post)
 
     def test_cache_in_index_page(self):
-        """Удостоверимся, что на главую страницу передаётся список из постов"""
+        """Главная страница берётся из кеша, пока посты не менялись"""
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertContains(response, self.post.text)
-        Post.objects.all().delete()
+        Post.objects.all().update(text='Изменено без сигналов')
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertContains(response, self.post.text)
         cache.clear()
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertNotContains(response, self.post.text)
 
+    def test_index_cache_invalidated_on_post_changes(self):
+        """Создание и удаление поста сразу видны на главной странице"""
+        self.authorized_client.get(reverse('posts:index'))
+        new_post = Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, new_post.text)
+        self.assertIn('max-age=0', response['Cache-Control'])
+        Post.objects.all().delete()
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.post.text)
+
+    def test_index_cache_invalidated_on_user_changes(self):
+        """Новое имя автора сразу видно на главной, вход — не сбрасывает
+        кеш"""
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        version = get_cache_version('index_page')
+        User.objects.get(pk=self.user3.pk).save(update_fields=['last_login'])
+        self.assertEqual(get_cache_version('index_page'), version)
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, '/profile/renamed/')
+
     def test_image_in_index_page(self):
         """Удостоверимся, что на главую страницу передаётся изображение"""
         response = self.authorized_client.get(reverse('posts:index'))
@@ -310,3 +341,217 @@ class PaginatorViewsTest(TestCase):
         response = self.authorized_client.get(
             reverse('posts:profile', kwargs={'username': 'admin'}))
         self.assertEqual(len(response.context['page_obj']), 10)
+
+
+@override_settings(POSTS_PAGINATION='cursor')
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='admin')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Текст {i}',
+                group=cls.group)
+            for i in range(25)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_follow_cursor(self):
+        """Курсорные страницы идут подряд без пропусков и повторов."""
+        url = reverse('posts:posts', kwargs={'slug': 'test-slug'})
+        seen = []
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_previous())
+        seen.extend(post.pk for post in page_obj)
+        while page_obj.has_next():
+            response = self.client.get(url + page_obj.next_url)
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+        self.assertEqual(len(page_obj), 5)
+        self.assertEqual(
+            seen, [post.pk for post in reversed(self.posts)])
+
+    def test_previous_cursor(self):
+        """Ссылка «Предыдущая» возвращает на ту же страницу."""
+        url = reverse('posts:profile', kwargs={'username': 'admin'})
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url + first.next_url).context['page_obj']
+        back = self.client.get(
+            url + second.previous_url).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Некорректный курсор отдаёт первую страницу."""
+        response = self.client.get(reverse('posts:index') + '?cursor=xx')
+        self.assertEqual(response.context['page_obj'][0], self.posts[-1])
+
+
+class CachedCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='admin')
+        for i in range(3):
+            Post.objects.create(author=cls.user, text=f'Текст {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Повторный подсчёт постов не обращается к базе."""
+        self.assertEqual(cached_count(Post.objects.all()), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count(Post.objects.all()), 3)
+
+    def test_count_invalidated_on_post_changes(self):
+        """Создание и удаление поста сбрасывает закешированное число."""
+        self.assertEqual(cached_count(Post.objects.all()), 3)
+        post = Post.objects.create(author=self.user, text='Новый')
+        self.assertEqual(cached_count(Post.objects.all()), 4)
+        post.delete()
+        self.assertEqual(cached_count(Post.objects.all()), 3)
+
+    @override_settings(POSTS_COUNT_ESTIMATE_THRESHOLD=0)
+    def test_estimated_count_for_whole_table(self):
+        """Без условий используется оценка из статистики СУБД."""
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.bulk_create([Post(author=self.user, text='Текст 3')])
+        self.assertEqual(cached_count(Post.objects.all()), 3)
+        self.assertEqual(
+            cached_count(Post.objects.filter(author=self.user)), 4)
+
+    def test_page_window(self):
+        """Навигация показывает только страницы рядом с текущей."""
+        paginator = Paginator(range(1000), 10)
+        self.assertEqual(page_window(paginator.page(50)),
+                         [1, None, 48, 49, 50, 51, 52, None, 100])
+        self.assertEqual(page_window(paginator.page(2)),
+                         [1, 2, 3, 4, None, 100])
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='author0')
+        for i in range(POST_PER_PAGE):
+            author = User.objects.create_user(
+                username=f'author{i + 1}', first_name='Имя',
+                last_name='Фамилия')
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='-')
+            Post.objects.create(author=author, text='Текст', group=group)
+            Post.objects.create(
+                author=cls.author, text='Текст', group=cls.group)
+            Follow.objects.create(user=cls.reader, author=author)
+        UserStats.objects.for_user(cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_feed_query_budget(self):
+        """Авторы и группы постов подгружаются вместе с постами."""
+        # Состояние для ETag и Last-Modified берётся из кеша;
+        # публичные страницы не читают ни сессию, ни пользователя.
+        budgets = {
+            reverse('posts:index'): 2,
+            reverse('posts:posts', kwargs={'slug': 'test-slug'}): 3,
+            reverse('posts:profile', kwargs={'username': 'author0'}): 4,
+            reverse('posts:follow_index'): 4,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    response = self.authorized_client.get(url)
+                self.assertEqual(len(response.context['page_obj']),
+                                 POST_PER_PAGE)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='admin')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Исходный текст', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:profile', kwargs={'username': 'admin'})
+
+    def test_card_is_cached(self):
+        """Карточка поста берётся из кеша, пока пост не изменён."""
+        self.authorized_client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Исходный текст')
+
+    def test_card_refreshed_after_edit(self):
+        """После редактирования поста карточка рисуется заново."""
+        self.authorized_client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст', 'group': self.group.pk})
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Исходный текст')
+
+    def test_stale_card_dropped_from_cache(self):
+        """Сохранение поста удаляет из кеша карточку прежней версии."""
+        self.authorized_client.get(self.url)
+        key = make_template_fragment_key(
+            'post_card', [self.post.pk, self.post.updated,
+                          get_cache_version(POST_CARDS_NAMESPACE)])
+        self.assertIsNotNone(cache.get(key))
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIsNone(cache.get(key))
+
+    def test_card_refreshed_after_rename(self):
+        """Смена имени автора или адреса группы обновляет карточки."""
+        group_url = reverse('posts:posts', kwargs={'slug': 'test-slug'})
+        self.authorized_client.get(self.url)
+        self.authorized_client.get(group_url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое'
+        user.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Новое')
+        self.assertContains(response, '/group/new-slug/')
+        group_url = reverse('posts:posts', kwargs={'slug': 'new-slug'})
+        response = self.authorized_client.get(group_url)
+        self.assertContains(response, 'Новое')
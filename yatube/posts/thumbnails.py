@@ -0,0 +1,168 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После сохранения поста с новой картинкой миниатюры всех ширин из
+POST_THUMBNAIL_WIDTHS готовятся в пуле потоков из компактной копии
+картинки, если она есть, а до тех пор шаблоны показывают заглушку.
+Адреса готовых миниатюр хранятся одной строкой PostThumbnails на пост
+и в кеше, так что страница постов получает их одним запросом.
+Зависшие посты догоняет команда ``manage.py generate_thumbnails``.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.images import get_image_dimensions
+from django.db import OperationalError, close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+from core.cache import bump_cache_version
+from .conditional import group_feeds, touch_feeds
+from .models import Post, PostThumbnails
+from .utils import forget_post_card
+
+logger = logging.getLogger(__name__)
+
+# Ширина карточки поста: миниатюра этой ширины идёт в src.
+DEFAULT_WIDTH: int = 960
+CACHE_TIMEOUT: int = 60 * 60 * 24
+# Повторы в потоке пула, пока SQLite занята чужой записью.
+RETRIES: int = 3
+RETRY_DELAY: float = 0.5
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails')
+    return _executor
+
+
+def _cache_key(post_id):
+    return f'post_thumbnails:{post_id}'
+
+
+def thumbnail_height(width):
+    """Высота миниатюры заданной ширины с пропорциями карточки."""
+    ratio_width, ratio_height = settings.POST_THUMBNAIL_ASPECT
+    return round(width * ratio_height / ratio_width)
+
+
+def thumbnail_widths(image_width=None):
+    """Ширины миниатюр, не превышающие ширину исходной картинки."""
+    widths = sorted(settings.POST_THUMBNAIL_WIDTHS)
+    if not image_width:
+        return widths
+    return [width for width in widths if width <= image_width] or widths[:1]
+
+
+def generate(post_id):
+    """Готовит миниатюры поста и отмечает их готовность."""
+    post = Post.objects.filter(pk=post_id).select_related('author').only(
+        'image', 'image_width', 'image_compact', 'group_id', 'updated',
+        'author__username').first()
+    if post is None or not post.image:
+        return
+    # Компактная копия меньше оригинала и быстрее читается.
+    source = post.image_compact or post.image
+    if not source.storage.exists(source.name):
+        logger.warning('Картинка поста %s не найдена: %s',
+                       post_id, source.name)
+        return
+    dimensions = {}
+    if post.image_width is None:
+        # Посты из импорта приходят без размеров картинки.
+        with post.image.open('rb') as image:
+            dimensions['image_width'], dimensions['image_height'] = (
+                get_image_dimensions(image))
+    urls = {}
+    for width in thumbnail_widths(
+            dimensions.get('image_width', post.image_width)):
+        urls[width] = get_thumbnail(
+            source, f'{width}x{thumbnail_height(width)}',
+            crop='center', upscale=True).url
+    metrics.incr('thumbnails', len(urls))
+    src_width = max([width for width in urls if width <= DEFAULT_WIDTH]
+                    or [min(urls)])
+    entry = {
+        'image': post.image.name,
+        'src': urls[src_width],
+        'srcset': ', '.join(f'{url} {width}w' for width, url in urls.items()),
+    }
+    PostThumbnails.objects.update_or_create(post_id=post_id, defaults=entry)
+    cache.set(_cache_key(post_id), entry, CACHE_TIMEOUT)
+    Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails_ready=True, **dimensions)
+    # Карточка и лента с заглушкой в кеше должны перерисоваться.
+    forget_post_card(post_id, post.updated)
+    bump_cache_version('index_page')
+    touch_feeds('index', f'profile:{post.author.username}',
+                *group_feeds(post.group_id))
+
+
+def get_index(post_ids):
+    """Миниатюры постов по id: один запрос к кешу и не больше
+    одного к базе для постов, которых в кеше не оказалось."""
+    keys = {_cache_key(post_id): post_id for post_id in post_ids}
+    entries = {keys[key]: entry
+               for key, entry in cache.get_many(keys).items()}
+    missing = [post_id for post_id in post_ids if post_id not in entries]
+    if missing:
+        rows = PostThumbnails.objects.filter(post_id__in=missing).values(
+            'post_id', 'image', 'src', 'srcset')
+        fetched = {row.pop('post_id'): row for row in rows}
+        cache.set_many({_cache_key(post_id): entry
+                        for post_id, entry in fetched.items()},
+                       CACHE_TIMEOUT)
+        entries.update(fetched)
+    return entries
+
+
+def _generate_logged(post_id, retries=0):
+    for attempt in range(retries + 1):
+        try:
+            generate(post_id)
+            return
+        except OperationalError:
+            # «database is locked»: база занята чужой записью.
+            if attempt < retries:
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+                continue
+            logger.exception('Не удалось подготовить миниатюры поста %s',
+                             post_id)
+        except Exception:
+            logger.exception('Не удалось подготовить миниатюры поста %s',
+                             post_id)
+        return
+
+
+def _run(post_id):
+    try:
+        _generate_logged(post_id, RETRIES)
+    finally:
+        close_old_connections()
+
+
+def schedule(post_id):
+    """Ставит подготовку миниатюр в очередь после фиксации транзакции."""
+    def submit():
+        if settings.THUMBNAIL_WORKERS:
+            _get_executor().submit(_run, post_id)
+        else:
+            _generate_logged(post_id)
+
+    transaction.on_commit(submit)
+
+
+def shutdown():
+    """Дожидается очереди миниатюр и останавливает пул."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
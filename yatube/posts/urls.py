@@ -13,7 +13,12 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='posts'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='comments'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('fragments/', views.fragments, name='fragments'),
+    path('export/<str:kind>/', views.export_data, name='export'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
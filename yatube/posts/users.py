@@ -0,0 +1,111 @@
+"""Кеш пользователей по имени для страниц профиля и подписок.
+
+Два уровня: небольшой LRU в памяти процесса и общий кеш. Хранится
+только то, что нужно страницам (id, имя, фамилия); пользователь
+возвращается как экземпляр User с отложенными остальными полями.
+При сохранении и удалении пользователя записи удаляются из обоих
+уровней (см. posts/signals.py). Другие процессы узнают об изменении
+не позже чем через USER_CACHE_LOCAL_TIMEOUT секунд.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import User
+
+FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+_local = OrderedDict()
+_lock = Lock()
+
+
+def _key(username):
+    return f'user:{username}'
+
+
+def _local_get(username):
+    with _lock:
+        entry = _local.get(username)
+        if entry is None:
+            return None
+        expires, values = entry
+        if expires < time.monotonic():
+            del _local[username]
+            return None
+        _local.move_to_end(username)
+        return values
+
+
+def _local_set(username, values):
+    expires = time.monotonic() + settings.USER_CACHE_LOCAL_TIMEOUT
+    with _lock:
+        _local[username] = (expires, values)
+        _local.move_to_end(username)
+        while len(_local) > settings.USER_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def _user(values):
+    return User.from_db('default', FIELDS, values)
+
+
+def get_users(usernames):
+    """{имя: User} для существующих пользователей из списка.
+
+    Промахи обоих уровней добираются из базы одним запросом.
+    """
+    found = {}
+    missing = set()
+    for username in set(usernames):
+        values = _local_get(username)
+        if values is None:
+            missing.add(username)
+        else:
+            found[username] = values
+    if missing:
+        shared = cache.get_many([_key(username) for username in missing])
+        for username in list(missing):
+            values = shared.get(_key(username))
+            if values is not None:
+                found[username] = values
+                missing.discard(username)
+                _local_set(username, values)
+    if missing:
+        rows = User.objects.filter(username__in=missing).values_list(*FIELDS)
+        fetched = {values[1]: values for values in rows}
+        cache.set_many({_key(username): values
+                        for username, values in fetched.items()},
+                       settings.USER_CACHE_TIMEOUT)
+        for username, values in fetched.items():
+            _local_set(username, values)
+        found.update(fetched)
+    return {username: _user(values) for username, values in found.items()}
+
+
+def get_user(username):
+    """User по имени или None."""
+    return get_users([username]).get(username)
+
+
+def get_user_or_404(username):
+    user = get_user(username)
+    if user is None:
+        raise Http404
+    return user
+
+
+def invalidate(*usernames):
+    """Удаляет пользователей из обоих уровней кеша."""
+    with _lock:
+        for username in usernames:
+            _local.pop(username, None)
+    cache.delete_many([_key(username) for username in usernames])
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
@@ -1,12 +1,45 @@
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_cache_version
+from .counts import CachedCountPaginator
+from .pagination import CursorPaginator
 
 POST_PER_PAGE: int = 10
+COMMENT_PER_PAGE: int = 20
+# Карточки постов в шаблонах: {% cache post_card %} на общих страницах
+# и {% cache group_post_card %} на странице группы.
+POST_CARD_FRAGMENTS = ('post_card', 'group_post_card')
+# Версия карточек: меняется, когда переименован автор или группа.
+POST_CARDS_NAMESPACE = 'post_cards'
 
 
 def paginator_page(request, posts):
 
-    paginator = Paginator(posts, POST_PER_PAGE)
+    if settings.POSTS_PAGINATION == 'cursor':
+        paginator = CursorPaginator(posts, POST_PER_PAGE)
+        return paginator.get_page(request.GET.get('cursor'), request.GET)
+
+    paginator = CachedCountPaginator(posts, POST_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return page_obj
+
+
+def comments_page(request, post):
+    """Страница комментариев поста, от новых к старым, по курсору."""
+    comments = post.comments.select_related('author').only(
+        'text', 'pub_date', 'post_id', 'author__username')
+    paginator = CursorPaginator(comments, COMMENT_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'), request.GET)
+
+
+def forget_post_card(post_id, updated):
+    """Удаляет из кеша карточки версии поста."""
+    if updated is not None:
+        version = get_cache_version(POST_CARDS_NAMESPACE)
+        cache.delete_many([
+            make_template_fragment_key(name, [post_id, updated, version])
+            for name in POST_CARD_FRAGMENTS])
@@ -1,57 +1,96 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import redirect
 from django.shortcuts import render, get_object_or_404
-from django.views.decorators.cache import cache_page
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from core.cache import versioned_cache_page
+from core.db_router import replica_view, write_view
+from . import export
+from .conditional import (conditional_page, group_state, index_state,
+                          post_state, profile_state)
+from .feed import follow_feed
+from .follows import follow_many, unfollow_many
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
-from .utils import paginator_page
+from .fragments import FRAGMENTS, public_page, render_fragment
+from .models import Post, Group, UserStats
+from .search import get_backend
+from .users import get_user_or_404
+from .utils import POST_PER_PAGE, comments_page, paginator_page
 
+INDEX_CACHE_TIMEOUT: int = 60 * 60 * 6
 
-@cache_page(20, key_prefix='index_page')
+
+@replica_view
+@public_page
+@conditional_page(index_state)
+@versioned_cache_page(INDEX_CACHE_TIMEOUT, 'index_page')
 def index(request):
 
-    posts = Post.objects.all()
+    posts = Post.objects.for_feed()
 
     return render(request, 'posts/index.html',
                   {'page_obj': paginator_page(request, posts)})
 
 
+@replica_view
+@public_page
+@conditional_page(group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.for_feed()
 
     return render(request, 'posts/group_list.html',
                   {'group': group, 'page_obj': paginator_page(request, posts)})
 
 
+@replica_view
+@public_page
+@conditional_page(profile_state)
 def profile(request, username):
 
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    following = Follow.objects.filter(author=author)
+    author = get_user_or_404(username)
+    posts = author.posts.for_feed()
 
     return render(request, 'posts/profile.html',
                   {'author': author,
-                   'page_obj': paginator_page(request, posts),
-                   'following': following, })
+                   'stats': UserStats.objects.for_user(author),
+                   'page_obj': paginator_page(request, posts)})
 
 
+@replica_view
+@public_page
+@conditional_page(post_state)
 def post_detail(request, post_id):
     posts = get_object_or_404(Post, pk=post_id)
     title = posts.text[:30]
-    comment = posts.comments.all()
-    isauthor: bool = str(posts.author) == str(request.user)
+    comment = comments_page(request, posts)
+    author_stats = UserStats.objects.for_user(posts.author_id)
     form = CommentForm(request.POST or None)
     if not form.is_valid():
         return render(request, 'posts/post_detail.html', {'posts': posts,
+                                                          'author_stats':
+                                                          author_stats,
                                                           'title': title,
-                                                          'isauthor': isauthor,
                                                           'form': form,
                                                           'comments': comment})
     form.save()
     return redirect('posts:post_detail', post_id)
 
 
+@replica_view
+@public_page
+@conditional_page(post_state)
+def post_comments(request, post_id):
+    posts = get_object_or_404(Post.objects.only('id'), pk=post_id)
+
+    return render(request, 'includes/comment_list.html',
+                  {'posts': posts,
+                   'comments': comments_page(request, posts)})
+
+
 @login_required
 def post_сreate(request):
     form = PostForm(request.POST or None,
@@ -91,29 +130,63 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_view
 @login_required
 def follow_index(request):
-    user = get_object_or_404(User, username=request.user)
-
-    posts = Post.objects.filter(author__following__user=user)
+    posts = follow_feed(request.user).for_feed()
 
     return render(request, 'posts/follow.html',
                   {'page_obj': paginator_page(request, posts)})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = get_backend().search(query, Post.objects.for_feed())
+    page_obj = Paginator(results, POST_PER_PAGE).get_page(
+        request.GET.get('page'))
+
+    return render(request, 'posts/search.html',
+                  {'query': query, 'page_obj': page_obj})
+
+
+def fragments(request):
+    parts = {name: render_fragment(request, name, arg)
+             for name, arg in request.GET.items() if name in FRAGMENTS}
+    response = JsonResponse(parts)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+@staff_member_required
+def export_data(request, kind):
+    if kind not in export.EXPORTS:
+        raise Http404
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    content_type = ('text/csv' if export_format == 'csv'
+                    else 'application/x-ndjson')
+    try:
+        lines = export.render(kind, export_format, request.GET.get('after'))
+    except ValueError:
+        return HttpResponseBadRequest('Неверный курсор выгрузки')
+    response = StreamingHttpResponse(
+        lines, content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{export_format}"')
+    return response
+
+
+@write_view
 @login_required
 def profile_follow(request, username):
-    user = get_object_or_404(User, username=request.user.username)
-    author = get_object_or_404(User, username=username)
-    if not request.user.username == username:
-        Follow.objects.get_or_create(user=user, author=author)
+    follow_many(request.user, [username])
     return redirect('posts:profile', username)
 
 
+@write_view
 @login_required
 def profile_unfollow(request, username):
-    user = get_object_or_404(User, username=request.user.username)
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=user, author=author).delete()
-
+    unfollow_many(request.user, [username])
     return redirect('posts:profile', username)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -55,21 +56,27 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaReadsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+# Кеш скомпилированных шаблонов в загрузчике с прогревом при старте
+# (см. core/template_backends.py). None — включён, когда выключен DEBUG.
+TEMPLATE_CACHE = None
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -97,6 +104,23 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую
+# в YATUBE_DB_REPLICAS. С них читают GET-запросы к лентам и постам
+# (@replica_view, см. core/db_router.py), а клиент, который что-то
+# изменил, ещё REPLICA_STICKY_SECONDS секунд читает из основной базы.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(','))):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,8 +165,76 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кеш: 'locmem' — свой у каждого процесса; 'file' и 'memcached' —
+# общий для всех процессов на машине (каталог или unix-сокет
+# в YATUBE_CACHE_LOCATION). Для 'memcached' нужен python-memcached.
+CACHE_BACKEND = os.getenv('YATUBE_CACHE', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache_backends.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'core.cache_backends.FileBasedCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION',
+                              os.path.join(BASE_DIR, 'cache')),
+    },
+    'memcached': {
+        'BACKEND': 'core.cache_backends.MemcachedCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION',
+                              'unix:/tmp/memcached.sock'),
+    },
+}
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
 }
+
+# Режим пагинации лент постов: 'offset' — номера страниц (Paginator),
+# 'cursor' — переход по ключу (pub_date, id) без COUNT(*) и OFFSET.
+POSTS_PAGINATION = 'offset'
+
+# Если задано число, количество постов для ленты без фильтров берётся
+# из статистики СУБД, когда оценка не меньше этого порога.
+POSTS_COUNT_ESTIMATE_THRESHOLD = None
+
+# Материализованная лента подписок (см. posts/feed.py). При включении
+# на базе с подписками ленты заполняет manage.py fill_follow_feed.
+FOLLOW_FEED_MATERIALIZED = False
+# Посты авторов с большим числом подписчиков не раскладываются
+# по лентам, а подмешиваются при чтении.
+FOLLOW_FEED_FANOUT_LIMIT = 10000
+# Сколько последних постов автора попадает в ленту при подписке.
+FOLLOW_FEED_BACKFILL = 100
+
+# Ширины и пропорции миниатюр, которые готовятся в фоне после
+# сохранения поста (см. posts/thumbnails.py), и число потоков для этого;
+# 0 — готовить сразу после фиксации транзакции в том же процессе.
+POST_THUMBNAIL_WIDTHS = [480, 960, 1440]
+POST_THUMBNAIL_ASPECT = (960, 339)
+THUMBNAIL_WORKERS = 2
+
+# Загруженные картинки постов уменьшаются до этого размера по большей
+# стороне, а рядом сохраняется копия в первом формате из списка,
+# который поддерживает установленный Pillow (см. posts/images.py).
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_FORMATS = ['AVIF', 'WEBP']
+POST_IMAGE_QUALITY = 80
+
+# Бэкенд полнотекстового поиска (см. posts/search.py). None — FTS5
+# на SQLite, где он есть, иначе обратный индекс в таблице SearchTerm.
+POSTS_SEARCH_BACKEND = None
+
+# Замеры каждого запроса (SQL, шаблоны, кеш, миниатюры) в заголовке
+# Server-Timing, логе core.metrics и сводке /metrics/ для персонала.
+REQUEST_METRICS = False
+
+# Сколько секунд общие кеши (прокси, CDN) могут отдавать публичные
+# страницы без сверки с сервером (см. posts/fragments.py).
+PUBLIC_PAGE_CACHE_TIMEOUT = 60
+
+# Кеш пользователей по имени (см. posts/users.py): сколько записей
+# держит LRU процесса и сколько секунд они живут там и в общем кеше.
+USER_CACHE_SIZE = 1024
+USER_CACHE_LOCAL_TIMEOUT = 30
+USER_CACHE_TIMEOUT = 60 * 15